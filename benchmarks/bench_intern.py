@@ -0,0 +1,93 @@
+# -*- coding: utf8 -*-
+"""
+memory kept by resolved configs of many variations of one project, with and without StickyProjectManager.use_intern.
+
+    python -m benchmarks.bench_intern [--variations 200] [--variation-ratio 0.1]
+
+parsed files are cached before measuring, so numbers are memory added by resolutions (and the intern table).
+"""
+from __future__ import print_function
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.normpath(os.path.join(__file__, "../../src")))
+
+from sticky.StickyCache import clear_cache  # noqa: E402
+from sticky.StickyContext import StickyContext  # noqa: E402
+from sticky.StickyProjectManager import StickyProjectManager  # noqa: E402
+from sticky.StickyIntern import Interner  # noqa: E402
+
+from benchmarks.generator import generate  # noqa: E402
+
+
+def measure(tree, use_intern):
+    import gc
+    import tracemalloc
+
+    manager = StickyProjectManager()
+    manager.root_directory = tree["env"]
+    manager.use_resolution_cache = False
+    manager.use_intern = use_intern
+    contexts = [StickyContext(tree["projects"][0], variation, tree["tools"][0] if tree["tools"] else False)
+                for variation in tree["variations"]]
+
+    clear_cache()
+    for context in contexts:
+        # parse every file before measuring
+        manager.resolve(context)
+
+    manager.interner = Interner()
+    start = time.time()
+    resolutions = [manager.resolve(context) for context in contexts]
+    seconds = time.time() - start
+
+    del resolutions
+    manager.interner = Interner()
+    gc.collect()
+    tracemalloc.start()
+    resolutions = [manager.resolve(context) for context in contexts]
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    del resolutions
+    return size, seconds
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--variations", type=int, default=200)
+    parser.add_argument("--variation-ratio", type=float, default=0.1)
+    parser.add_argument("--data-size", type=int, default=400)
+    parser.add_argument("--list-size", type=int, default=100)
+    options = parser.parse_args(args)
+
+    try:
+        import tracemalloc  # noqa: F401
+    except ImportError:
+        print("tracemalloc is not available")
+        return
+
+    root = tempfile.mkdtemp()
+    try:
+        tree = generate(root.replace("\\", "/"), projects=1, tools=1, variations=options.variations,
+                        variation_ratio=options.variation_ratio, data_size=options.data_size,
+                        list_size=options.list_size, key_files=0)
+        plain, plain_seconds = measure(tree, False)
+        interned, interned_seconds = measure(tree, True)
+        print("{} variations".format(options.variations))
+        print("plain    {:10.1f}KB  {:8.4f}s".format(plain / 1024.0, plain_seconds))
+        print("interned {:10.1f}KB  {:8.4f}s  x{:.2f} memory".format(
+            interned / 1024.0, interned_seconds, interned / float(max(plain, 1))))
+    finally:
+        clear_cache()
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# -*- coding: utf8 -*-
+"""
+time merging lists of dicts with "name" key in StickyConfig.values_override and trace_data.
+
+    python -m benchmarks.bench_named_list [--sizes 1000 5000 10000]
+"""
+from __future__ import print_function
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.normpath(os.path.join(__file__, "../../src")))
+
+from sticky.Sticky import StickyConfig  # noqa: E402
+
+
+def make_lists(size):
+    base = [{"name": "item{}".format(i), "value": i, "path": "/base/{}".format(i)} for i in range(size)]
+    # half of entries are overridden (in reverse order), a tenth are cancelled and a tenth are new
+    override = [{"name": "item{}".format(i), "value": -i} for i in range(size - 1, -1, -2)]
+    override.extend({"name": "item{}".format(i), "cancel": True} for i in range(0, size, 10))
+    override.extend({"name": "new{}".format(i), "value": i} for i in range(size // 10))
+    return base, override
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 2500, 5000, 10000])
+    options = parser.parse_args(args)
+
+    obj = StickyConfig()
+    for size in options.sizes:
+        base, override = make_lists(size)
+        start = time.time()
+        result = obj.values_override({"shots": base}, {"shots": override})
+        override_time = time.time() - start
+
+        base, override = make_lists(size)
+        start = time.time()
+        obj.trace_data({"shots": result["shots"]}, {"shots": override}, "env/override.yml")
+        trace_time = time.time() - start
+
+        print("{:7d} entries  values_override: {:8.4f}s  trace_data: {:8.4f}s".format(size, override_time, trace_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# -*- coding: utf8 -*-
+"""
+compare StickyConfig.read and StickyConfig.read_info on files with large data sections.
+
+    python -m benchmarks.bench_read_info [--size 4] [--repeat 3]
+"""
+from __future__ import print_function
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.normpath(os.path.join(__file__, "../../src")))
+
+from sticky.Sticky import StickyConfig  # noqa: E402
+from sticky.StickyBackend import get_backend  # noqa: E402
+
+
+def make_data(megabytes):
+    data = {}
+    i = 0
+    # about 100 bytes per entry in yaml
+    while i < megabytes * 10000:
+        data["key{:07d}".format(i)] = {"name": "value{}".format(i),
+                                       "list": [i, i + 1, i + 2],
+                                       "path": "<project>/<episode>/data"}
+        i += 1
+
+    return data
+
+
+def best(func, repeat):
+    times = []
+    for i in range(repeat):
+        start = time.time()
+        func()
+        times.append(time.time() - start)
+
+    return min(times)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=4, help="size of data section in megabytes")
+    parser.add_argument("--repeat", type=int, default=3)
+    options = parser.parse_args(args)
+
+    directory = tempfile.mkdtemp()
+    try:
+        obj = StickyConfig(directory)
+        obj.use_cache = False
+        data = make_data(options.size)
+        for ext in ["yml", "json"]:
+            path = os.path.join(directory, "base.{}".format(ext))
+            obj.save(path, info={"name": "base", "parent": "../parent.yml"}, data=data)
+            size = os.path.getsize(path) / 1024.0 / 1024.0
+
+            read = best(lambda: obj.read(path), options.repeat)
+            read_info = best(lambda: obj.read_info(path), options.repeat)
+            print("{:5s} {:6.2f}MB  read: {:8.4f}s  read_info: {:8.4f}s  x{:.1f}".format(
+                ext, size, read, read_info, read / max(read_info, 1e-9)))
+
+            # files written with info after data. info is reached only after skipping data events.
+            if ext == "yml":
+                get_backend(path).dump_file(OrderedDict([("data", data), ("info", {"name": "base"})]), path)
+                read_info = best(lambda: obj.read_info(path), options.repeat)
+                print("{:5s} {:6.2f}MB  read_info with info after data: {:8.4f}s  x{:.1f}".format(
+                    ext, size, read_info, read / max(read_info, 1e-9)))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# -*- coding: utf8 -*-
+"""
+synthetic studio env trees for benchmarks.
+
+    root/
+        env/
+            layers/layer0.yml ...            chain under base (depth)
+            base.v1.yml ... base.vN.yml
+            project0.v1.yml ... project0.vN.yml
+            project0.var0.v1.yml
+            tool0.v1.yml, tool0.project0.v1.yml, tool0.project0.var0.v1.yml
+        shots/
+            ep01_s01_c001.yml ...            key files for get_key_file
+"""
+from __future__ import print_function
+
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.normpath(os.path.join(__file__, "../../src")))
+
+from sticky.Sticky import StickyConfig  # noqa: E402
+
+DEFAULTS = {"depth": 4,             # files under base.v1
+            "projects": 4,
+            "variations": 4,        # per project
+            "tools": 2,
+            "versions": 3,          # vN files of base and projects
+            "list_size": 50,        # items of named lists
+            "template_density": 0.2,  # ratio of strings with <field> keys
+            "data_size": 200,       # leaf values per file
+            "variation_ratio": 1.0,  # size of data of variation files relative to data_size and list_size
+            "key_files": 500,       # files in shots directory
+            "seed": 0}
+
+
+class Generator(object):
+    def __init__(self, **kwargs):
+        self.options = dict(DEFAULTS)
+        self.options.update(kwargs)
+        self.random = random.Random(self.options["seed"])
+        self.sticky = StickyConfig()
+        self.files = 0
+
+    def value(self, i):
+        if self.random.random() < self.options["template_density"]:
+            return "<project>/<episode>/<scene>/value{}".format(i)
+
+        kind = i % 4
+        if kind == 0:
+            return i
+        elif kind == 1:
+            return i * 0.5
+        elif kind == 2:
+            return bool(i % 3)
+
+        return "value{}".format(self.random.randint(0, 1000))
+
+    def data(self, layer, ratio=1.0):
+        """
+        nested sections, a named list and leaves. upper layers override a part of the keys of lower layers.
+        """
+        size = int(self.options["data_size"] * ratio)
+        data = {}
+        for i in range(size):
+            if self.random.random() < 0.5:
+                continue
+            section = data.setdefault("section{}".format(i % 10), {})
+            group = section.setdefault("group{}".format(i % 7), {})
+            group["key{}".format(i)] = self.value(i + layer)
+
+        items = []
+        for i in range(int(self.options["list_size"] * ratio)):
+            if self.random.random() < 0.5:
+                items.append({"name": "item{}".format(i), "value": self.value(i), "layer": layer})
+        data["items"] = items
+        data["layer"] = layer
+        return data
+
+    def save(self, path, parent, layer, ratio=1.0):
+        self.sticky.save(path, info={"name": os.path.basename(path), "parent": parent}, data=self.data(layer, ratio))
+        self.files += 1
+
+    def generate(self, root):
+        """
+        write the tree to root. return dict of paths and names for benchmarks.
+        """
+        options = self.options
+        env = "{}/env".format(root)
+        layer = 0
+
+        parent = None
+        for i in range(options["depth"]):
+            path = "{}/layers/layer{}.yml".format(env, i)
+            self.save(path, parent, layer)
+            parent = "../layer{}.yml".format(i)
+            layer += 1
+
+        parent = "../layers/layer{}.yml".format(options["depth"] - 1) if options["depth"] else None
+        for v in range(1, options["versions"] + 1):
+            self.save("{}/base.v{}.yml".format(env, v), parent, layer)
+            parent = "../base.v{}.yml".format(v)
+            layer += 1
+        base = parent
+
+        projects = ["project{}".format(p) for p in range(options["projects"])]
+        variations = ["var{}".format(v) for v in range(options["variations"])]
+        tools = ["tool{}".format(t) for t in range(options["tools"])]
+        for project in projects:
+            parent = base
+            for v in range(1, options["versions"] + 1):
+                self.save("{}/{}.v{}.yml".format(env, project, v), parent, layer + 1)
+                parent = "../{}.v{}.yml".format(project, v)
+            for variation in variations:
+                self.save("{}/{}.{}.v1.yml".format(env, project, variation), parent, layer + 2,
+                          options["variation_ratio"])
+
+        for tool in tools:
+            self.save("{}/{}.v1.yml".format(env, tool), None, layer)
+            for project in projects:
+                self.save("{}/{}.{}.v1.yml".format(env, tool, project), "../{}.v1.yml".format(tool), layer + 1)
+                for variation in variations:
+                    self.save("{}/{}.{}.{}.v1.yml".format(env, tool, project, variation),
+                              "../{}.{}.v1.yml".format(tool, project), layer + 2, options["variation_ratio"])
+
+        shots = "{}/shots".format(root)
+        if not os.path.exists(shots):
+            os.makedirs(shots)
+        names = []
+        for i in range(options["key_files"]):
+            name = "ep{:02d}_s{:02d}_c{:03d}".format(i // 100 + 1, i // 10 % 10 + 1, i + 1)
+            with open("{}/{}.yml".format(shots, name), "w") as f:
+                f.write("info: {}\ndata: {}\n")
+            names.append(name)
+
+        return {"root": root,
+                "env": env,
+                "shots": shots,
+                "projects": projects,
+                "variations": variations,
+                "tools": tools,
+                "key_names": names,
+                "deepest": "{}/{}.{}.v1.yml".format(env, projects[-1], variations[-1]) if projects and variations else None,
+                "files": self.files + len(names),
+                "options": dict(options)}
+
+
+def generate(root, **kwargs):
+    return Generator(**kwargs).generate(root)
+
+
+def main(args=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="write a synthetic env tree.")
+    parser.add_argument("root")
+    for key, value in sorted(DEFAULTS.items()):
+        parser.add_argument("--{}".format(key.replace("_", "-")), type=type(value), default=value)
+    options = parser.parse_args(args)
+
+    tree = generate(options.root, **dict((key, getattr(options, key)) for key in DEFAULTS))
+    print("{} files in {}".format(tree["files"], tree["root"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+# -*- coding: utf8 -*-
+"""
+time main operations on a synthetic env tree and compare results with a baseline.
+
+    python -m benchmarks.run [--output results.json] [--baseline baseline.json] [--threshold 1.2]
+
+results are json: {"meta": {...}, "results": {name: {"best": sec, "mean": sec, "repeat": n}}}.
+with --baseline, names slower than threshold times the baseline are listed and the exit code is 1.
+"""
+from __future__ import print_function
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.normpath(os.path.join(__file__, "../../src")))
+
+from sticky.Sticky import StickyConfig  # noqa: E402
+from sticky.StickyCache import clear_cache, copy_tree  # noqa: E402
+from sticky.StickyProjectManager import StickyProjectManager  # noqa: E402
+
+from benchmarks.generator import DEFAULTS, generate  # noqa: E402
+
+
+def measure(func, setup=None, repeat=5):
+    """
+    call setup() (not timed) and func(setup result) repeat times.
+    """
+    times = []
+    for i in range(repeat):
+        state = setup() if setup is not None else None
+        start = time.time()
+        func(state)
+        times.append(time.time() - start)
+
+    return {"best": min(times), "mean": sum(times) / len(times), "repeat": repeat}
+
+
+def benchmarks(tree):
+    """
+    list of (name, func, setup).
+    """
+    obj = StickyConfig()
+    deepest = tree["deepest"]
+    chain = obj.get_override_file_list(deepest)
+    layers = [obj.read(path, copy=False)[1] for path in chain]
+    project, variation = tree["projects"][-1], tree["variations"][-1]
+    tool_name = tree["tools"][-1] if tree["tools"] else False
+
+    def _read_cold(state):
+        clear_cache()
+        for path in chain:
+            obj.read(path)
+
+    def _read_warm(state):
+        for path in chain:
+            obj.read(path)
+
+    def _get_override_file_list(state):
+        clear_cache()
+        obj.get_override_file_list(deepest)
+
+    def _copy_layers():
+        return [copy_tree(layer) for layer in layers]
+
+    def _values_override(state):
+        config = {}
+        for layer in state:
+            config = obj.values_override(config, layer)
+
+    def _values_merge(state):
+        config = {}
+        for layer in layers:
+            config = obj.values_override(config, layer, inplace=False)
+
+    def _merged():
+        config = {}
+        for layer in layers:
+            config = obj.values_override(config, layer, inplace=False)
+        return copy_tree(config)
+
+    def _trace_files(state):
+        obj.trace_files(state, chain)
+
+    key_obj = StickyConfig(tree["shots"])
+    template = "<episode>_<scene>_<cut>"
+    field_values = [{"<episode>": name[:4], "<scene>": name[5:8], "<cut>": name[9:]} for name in tree["key_names"]]
+
+    def _get_key_file(state):
+        for field_value in field_values:
+            key_obj.set_field_value(field_value)
+            key_obj.get_key_file(template)
+
+    def _set(state):
+        manager = StickyProjectManager()
+        manager.root_directory = tree["env"]
+        manager.set(project, variation, tool_name=tool_name)
+
+    def _set_cold(state):
+        clear_cache()
+        _set(state)
+
+    return [("read.cold", _read_cold, None),
+            ("read.warm", _read_warm, None),
+            ("get_override_file_list", _get_override_file_list, None),
+            ("values_override", _values_override, _copy_layers),
+            ("values_override.shared", _values_merge, None),
+            ("trace_files", _trace_files, _merged),
+            ("get_key_file", _get_key_file, None),
+            ("manager.set.cold", _set_cold, None),
+            ("manager.set.warm", _set, None)]
+
+
+def run(options=None, repeat=5, names=None):
+    """
+    generate a tree with options (see generator.DEFAULTS), time every benchmark and return results dict.
+    """
+    options = dict(DEFAULTS, **(options or {}))
+    root = tempfile.mkdtemp()
+    try:
+        tree = generate(root.replace("\\", "/"), **options)
+        results = {}
+        for name, func, setup in benchmarks(tree):
+            if names and name not in names:
+                continue
+            results[name] = measure(func, setup, repeat)
+    finally:
+        clear_cache()
+        shutil.rmtree(root)
+
+    return {"meta": {"python": platform.python_version(),
+                     "implementation": platform.python_implementation(),
+                     "platform": platform.platform(),
+                     "files": tree["files"],
+                     "options": options},
+            "results": results}
+
+
+def compare(results, baseline, threshold=1.2):
+    """
+    return list of (name, best, baseline best, ratio) and names slower than threshold times the baseline.
+    """
+    rows = []
+    regressions = []
+    for name, value in sorted(results["results"].items()):
+        base = baseline["results"].get(name)
+        if base is None:
+            rows.append((name, value["best"], None, None))
+            continue
+
+        ratio = value["best"] / max(base["best"], 1e-9)
+        rows.append((name, value["best"], base["best"], ratio))
+        if ratio > threshold:
+            regressions.append(name)
+
+    return rows, regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="time sticky operations on a synthetic env tree.")
+    parser.add_argument("--output", help="write results json")
+    parser.add_argument("--baseline", help="results json to compare with")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", action="append", help="benchmark name. repeatable.")
+    for key, value in sorted(DEFAULTS.items()):
+        parser.add_argument("--{}".format(key.replace("_", "-")), type=type(value), default=value)
+    options = parser.parse_args(args)
+
+    results = run(dict((key, getattr(options, key)) for key in DEFAULTS), options.repeat, options.only)
+
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if not options.baseline:
+        for name, value in sorted(results["results"].items()):
+            print("{:24s} {:10.6f}s  mean {:10.6f}s".format(name, value["best"], value["mean"]))
+        return 0
+
+    with open(options.baseline) as f:
+        baseline = json.load(f)
+
+    if baseline["meta"]["options"] != results["meta"]["options"]:
+        print("warning: baseline was made with other generator options")
+
+    rows, regressions = compare(results, baseline, options.threshold)
+    for name, best, base, ratio in rows:
+        if base is None:
+            print("{:24s} {:10.6f}s  (not in baseline)".format(name, best))
+        else:
+            print("{:24s} {:10.6f}s  baseline {:10.6f}s  x{:.2f}{}".format(
+                name, best, base, ratio, "  SLOWER" if name in regressions else ""))
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
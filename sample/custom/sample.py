@@ -29,3 +29,18 @@ def execute(keys, field_value):
     return field_value
 
 
+def execute_batch(keys, field_values):
+    targets = []
+    for key in keys:
+        if not "{" in key:
+            continue
+
+        name, unique = re.findall("(.*){(.*)}", key)[0]
+        targets.append((key, key.replace("{%s}" % unique, ""), unique))
+
+    for field_value in field_values:
+        for key, name, unique in targets:
+            if name in field_value:
+                field_value[key] = split_shot(unique, field_value[name])
+
+    return field_values
@@ -4,56 +4,163 @@ from __future__ import unicode_literals
 import os
 import re
 import copy
+import itertools
+import multiprocessing
+from collections import OrderedDict
+
+from sticky.StickyCache import file_cache, info_cache, directory_index, copy_tree
+from sticky.StickyBackend import get_backend, select_tree, select_data
+from sticky.StickyHook import hooks
+from sticky.StickyStats import stats
+
+
+FIELD_KEY = re.compile("(<[{a-zA-Z0-9._}]+>)")
+
+
+class CompiledTemplate(object):
+    """
+    template split into literal parts and field keys once.
+    keys, match and render give the same results as FieldValueGenerator.get_field_keys, get_field_value and generate.
+    """
+    __slots__ = ("template", "keys", "_parts", "_key_index", "_pattern", "_sequential")
+
+    def __init__(self, template):
+        self.template = template
+        self._parts = FIELD_KEY.split(template)
+        self._key_index = tuple(range(1, len(self._parts), 2))
+        self.keys = tuple(self._parts[1::2])
+        self._pattern = None
+        # "<" or ">" out of keys may make another key with a value. "<<a>b>"
+        self._sequential = any("<" in part or ">" in part for part in self._parts[0::2])
+
+    def match(self, value):
+        if self._pattern is None:
+            pattern = self.template
+            for key in self.keys:
+                pattern = pattern.replace(key, "(.*)")
+            self._pattern = re.compile(pattern, re.IGNORECASE)
+
+        values = self._pattern.match(value)
+        field_value = {}
+        if values:
+            groups = values.groups()
+            for i, key in enumerate(self.keys):
+                value = groups[i]
+                if "_" in value:
+                    return False
+                field_value[key] = value
+
+        return field_value
+
+    def render(self, field_value):
+        if not self.keys:
+            return self.template
+
+        if self._sequential:
+            return self._render_sequential(field_value)
+
+        parts = self._parts[:]
+        for i in self._key_index:
+            key = parts[i]
+            if key in field_value:
+                value = field_value[key]
+                if "<" in value or ">" in value:
+                    # value may make another key. replace keys one by one as before
+                    return self._render_sequential(field_value)
+                parts[i] = value
+
+        return "".join(parts)
+
+    def _render_sequential(self, field_value):
+        template = self.template
+        for key in self.keys:
+            if key in field_value:
+                template = template.replace(key, field_value[key])
+
+        return template
 
-import yaml
-import json
-import codecs
-import importlib
 
-try:
-    reload
-except NameError:
-    if hasattr(importlib, "reload"):
-        # for py3.4+
-        from importlib import reload
+_template_cache = {}
+TEMPLATE_CACHE_SIZE = 4096
+
+
+def compile_template(template):
+    compiled = _template_cache.get(template)
+    if stats.enabled:
+        stats.count("template.compile.hits" if compiled is not None else "template.compile.misses")
+
+    if compiled is None:
+        if len(_template_cache) >= TEMPLATE_CACHE_SIZE:
+            _template_cache.clear()
+        compiled = CompiledTemplate(template)
+        _template_cache[template] = compiled
+
+    return compiled
+
+
+def iter_chunks(iterable, size):
+    iterable = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterable, size))
+        if not chunk:
+            break
+        yield chunk
+
+
+def _match_chunk(args):
+    template, values = args
+    compiled = compile_template(template)
+    return [(value, compiled.match(value)) for value in values]
 
 
 class FieldValueGenerator(object):
-    def __init__(self):
-        pass
+    def __init__(self, hooks=hooks):
+        self.hooks = hooks
 
     def get_field_keys(self, template):
-        find_ = "(<[{a-zA-Z0-9._}]+>)"
-        return re.findall(find_, template) or []
+        return list(compile_template(template).keys)
 
     def get_field_value(self, template, value):
-        field_keys = self.get_field_keys(template)
-        # template = os.path.normpath(template)
-        for key in field_keys:
-            template = template.replace(key, "(.*)")
-
-        values = re.match(template, value, re.IGNORECASE)
-        field_value = {}
-        if values:
-            for i, key in enumerate(field_keys):
-                value = values.groups()[i]
-                if "_" in value:
-                    return False
-                field_value[key] = value
-
-        return field_value
+        return compile_template(template).match(value)
+
+    def get_field_value_iter(self, template, values, chunk_size=None, processes=None):
+        """
+        parse many values with one template. yield (value, field_value) in order.
+        field_value is same as get_field_value. (False when a field has "_", {} when not matched)
+        chunk_size: yield list of records for every chunk_size values.
+        processes: match in a process pool with the number of processes.
+        """
+        if processes:
+            pool = multiprocessing.Pool(processes)
+            try:
+                chunks = ((template, chunk) for chunk in iter_chunks(values, chunk_size or 4096))
+                for records in pool.imap(_match_chunk, chunks):
+                    if chunk_size:
+                        yield records
+                    else:
+                        for record in records:
+                            yield record
+            finally:
+                pool.terminate()
+                pool.join()
+            return
+
+        compiled = compile_template(template)
+        if chunk_size:
+            for chunk in iter_chunks(values, chunk_size):
+                yield [(value, compiled.match(value)) for value in chunk]
+        else:
+            for value in values:
+                yield value, compiled.match(value)
 
     def generate(self, template, field_value, force=False, custom_module_path=None):
-        field_keys = self.get_field_keys(template)
-        for key in field_keys:
-            if key in field_value:
-                template = template.replace(key,
-                                            field_value[key])
+        if stats.enabled:
+            stats.count("template.generate")
+
+        template = compile_template(template).render(field_value)
 
         if custom_module_path:
-            mod = importlib.import_module(custom_module_path)
-            reload(mod)
-            field_value = mod.execute(self.get_field_keys(template), field_value)
+            field_value = self.hooks.execute(custom_module_path, self.get_field_keys(template), field_value)
             template = self.generate(template, field_value, force=force)
 
         if "<" in template and not force:
@@ -61,8 +168,62 @@ class FieldValueGenerator(object):
 
         return template
 
+    def generate_iter(self, template, field_values, force=False, custom_module_path=None, chunk_size=256):
+        """
+        generate template for each field_value in field_values and yield results in order.
+        the template is compiled once. failed items are yielded as False like generate.
+        custom module is called with execute_batch for every chunk_size items.
+        """
+        compiled = compile_template(template)
+        if not custom_module_path:
+            for field_value in field_values:
+                result = compiled.render(field_value)
+                if "<" in result and not force:
+                    yield False
+                else:
+                    yield result
+            return
+
+        for chunk in iter_chunks(field_values, chunk_size):
+            results = [compiled.render(field_value) for field_value in chunk]
+
+            # items with same remaining keys are passed to the custom module together
+            groups = OrderedDict()
+            for i, result in enumerate(results):
+                keys = tuple(FIELD_KEY.findall(result))
+                if keys:
+                    groups.setdefault(keys, []).append(i)
+
+            for keys, indices in groups.items():
+                new_values = self.hooks.execute_batch(custom_module_path, list(keys), [chunk[i] for i in indices])
+                for i, field_value in zip(indices, new_values):
+                    results[i] = CompiledTemplate(results[i]).render(field_value)
+
+            for result in results:
+                if "<" in result and not force:
+                    yield False
+                else:
+                    yield result
+
+    def generate_columns(self, template, columns, force=False, custom_module_path=None, chunk_size=256):
+        """
+        same as generate_iter. field values are given as columns. {"<shot>": ["s01c01", "s01c02"], ...}
+        """
+        keys = list(columns.keys())
+        values = [columns[key] for key in keys]
+        lengths = set(len(v) for v in values)
+        if len(lengths) > 1:
+            raise ValueError("columns have different lengths: {}".format(
+                dict((key, len(columns[key])) for key in keys)))
+
+        field_values = (dict(zip(keys, row)) for row in zip(*values))
+        return self.generate_iter(template, field_values, force=force,
+                                  custom_module_path=custom_module_path, chunk_size=chunk_size)
+
 
 class StickyConfig(object):
+    use_cache = True
+
     def __init__(self, directory=None, field_value=None):
         self.directory = None
         self.field_value = None
@@ -80,18 +241,94 @@ class StickyConfig(object):
     def set_field_value(self, field_value):
         self.field_value = field_value
 
-    def read(self, path):
-        if path.endswith(".yml"):
-            with codecs.open(path, "r") as f:
-                yml_data = yaml.load(f, Loader=yaml.SafeLoader)
-                return yml_data["info"], yml_data["data"]
+    def read(self, path, copy=True, select=None):
+        """
+        return (info, data) of the file.
+        parsed files are kept in the process-wide cache while the file is unchanged.
+        copy=False returns cached objects itself. caller must not modify them.
+        select: key paths of data. ["general.resolution", "playblast"]
+            data has only the values at the paths, and yaml files are parsed without building other values.
+            values on the way which are not dicts are kept as type markers. see StickyBackend.select_data.
+        """
+        if stats.enabled:
+            stats.count("read.calls")
+
+        if select is not None:
+            return self._read_select(path, select, copy)
+
+        if self.use_cache and get_backend(path) is not None:
+            return file_cache.get(path, self._read, copy=copy)
+
+        return self._read(path)
+
+    def read_info(self, path, copy=True):
+        """
+        return info of the file without building its data.
+        """
+        backend = get_backend(path)
+        if backend is None:
+            return {}
+
+        if not self.use_cache:
+            return self._read_info(path)
+
+        cached = file_cache.peek(path)
+        if cached is not None:
+            info = cached[0]
+        else:
+            info = info_cache.get(path, self._read_info, copy=False)
+
+        return copy_tree(info) if copy else info
+
+    def _read_info(self, path):
+        backend = get_backend(path)
+        with stats.span("read_info.parse", path=path):
+            if hasattr(backend, "load_info"):
+                return backend.load_info(path)
+
+            return backend.load_file(path)["info"]
+
+    def _read_select(self, path, select, copy=True):
+        backend = get_backend(path)
+        if backend is None:
+            return {}, {}
+
+        cached = file_cache.peek(path) if self.use_cache else None
+        if cached is not None:
+            # the whole file was already parsed
+            info, data = cached
+            if isinstance(data, dict):
+                data = select_data(data, select_tree(select))
+            return (copy_tree(info), copy_tree(data)) if copy else (info, data)
+
+        if stats.enabled:
+            stats.count("read.parses")
+            stats.count("read.select_parses")
+            stats.count("read.bytes", os.path.getsize(path))
+
+        with stats.span("read.parse", path=path, select=",".join(select)):
+            if hasattr(backend, "load_select"):
+                doc = backend.load_select(path, select)
+            else:
+                doc = backend.load_file(path)
+                if isinstance(doc["data"], dict):
+                    doc["data"] = select_data(doc["data"], select_tree(select))
+
+        return doc["info"], doc["data"]
+
+    def _read(self, path):
+        backend = get_backend(path)
+        if backend is None:
+            return {}, {}
 
-        elif path.endswith(".json"):
-            with codecs.open(path, "r") as f:
-                json_data = json.load(f, encoding="utf8")
-                return json_data["info"], json_data["data"]
+        if stats.enabled:
+            stats.count("read.parses")
+            stats.count("read.bytes", os.path.getsize(path))
 
-        return {}, {}
+        with stats.span("read.parse", path=path):
+            doc = backend.load_file(path)
+
+        return doc["info"], doc["data"]
 
     def save(self, path, info=None, data={}, **args):
         if info is None:
@@ -100,45 +337,71 @@ class StickyConfig(object):
         if not os.path.exists(os.path.dirname(path)):
             os.makedirs(os.path.dirname(path))
 
-        if path.endswith(".json"):
-            with codecs.open(path, "w", encoding="utf8") as j:
-                json.dump({"info": info, "data": data}, j, ensure_ascii=False, indent=4)
-        else:
-            with codecs.open(path, "w", encoding="utf8") as y:
-                yaml.safe_dump({"info": info, "data": data}, y, allow_unicode=True)
+        backend = get_backend(path) or get_backend(".yml")
+        backend.dump_file(OrderedDict([("info", info), ("data", data)]), path)
+        file_cache.invalidate(path)
+        info_cache.invalidate(path)
 
-    def get_key_file(self, template, directory=None):
+    def get_key_file(self, template, directory=None, field_value=None):
+        """
+        directory and field_value default to values of set. pass them to share one StickyConfig between threads.
+        """
         if directory is None:
             directory = self.directory
 
-        key_files = os.listdir(directory)
+        if field_value is None:
+            field_value = self.field_value
+
+        return self._find_key_file(template, field_value, directory, directory_index.get(directory))
+
+    def get_key_files(self, templates_or_field_values, template=None, directory=None, field_value=None):
+        """
+        get_key_file for many lookups with one directory listing.
+        each item is a template (used with field_value) or a field_value (used with template).
+        """
+        if directory is None:
+            directory = self.directory
+
+        if field_value is None:
+            field_value = self.field_value
+
+        templates_or_field_values = list(templates_or_field_values)
+        if template is None and any(isinstance(each, dict) for each in templates_or_field_values):
+            raise ValueError("template is required to look up field values.")
+
+        key_files = directory_index.get(directory)
+        results = []
+        for each in templates_or_field_values:
+            if isinstance(each, dict):
+                results.append(self._find_key_file(template, each, directory, key_files))
+            else:
+                results.append(self._find_key_file(each, field_value, directory, key_files))
+
+        return results
+
+    def _find_key_file(self, template, field_value, directory, key_files):
+        # template, then shorter ones cut at each "_" from the end
         split_template = template.split("_")
-        key_file = False
         for i in range(len(split_template)):
-            if i == 0:
-                check = template
-            else:
-                check = "_".join(split_template[:-i])
-            key_name = self.generator.generate(check, self.field_value)
-            if key_name:
-                break_flg = False
-                for ext in ["yml", "json"]:
-                    if "{}.{}".format(key_name, ext) in key_files:
-                        key_file = "{}/{}.{}".format(directory,
-                                                     key_name,
-                                                     ext)
-                        break_flg = True
-                        break
-                if break_flg:
-                    break
-
-        return key_file
+            check = template if i == 0 else "_".join(split_template[:-i])
+            key_name = self.generator.generate(check, field_value)
+            if not key_name:
+                continue
+
+            for ext in ["yml", "json"]:
+                if "{}.{}".format(key_name, ext) in key_files:
+                    return "{}/{}.{}".format(directory, key_name, ext)
+
+        return False
 
     def get_override_file_list(self, path, field_value=None):
+        if stats.enabled:
+            stats.count("fs.exists")
+
         if not os.path.exists(path):
             return []
 
-        info, data = self.read(path)
+        info = self.read_info(path, copy=False)
         paths = [path]
         i = 0
         while info.get("parent", None):
@@ -148,9 +411,14 @@ class StickyConfig(object):
                     parent_path = parent_path.replace(k, v)
 
             parent = os.path.normpath(os.path.join(path, parent_path))
+            if stats.enabled:
+                stats.count("fs.exists")
+
             if os.path.exists(parent):
+                if stats.enabled:
+                    stats.count("get_override_file_list.hops")
                 paths.insert(0, parent)
-                info, data = self.read(parent)
+                info = self.read_info(parent, copy=False)
             else:
                 break
             i += 1
@@ -160,47 +428,18 @@ class StickyConfig(object):
 
         return paths
 
-    def values_override(self, base, override, use_field_value=False):
-        def value_mapping(value, use_field_value):
-            if not use_field_value:
-                return value
+    def values_override(self, base, override, use_field_value=False, inplace=True):
+        """
+        merge override onto base and return the result.
+        inplace=True updates override and returns it (or a mapped copy of it).
+        inplace=False leaves base and override untouched. unchanged values are shared between them and the result,
+        so the result must not be modified in place when the inputs are still used.
+        """
+        if not inplace:
+            return self._values_merge(base, override, use_field_value)
 
-            copy_field_value = copy.deepcopy(self.field_value)
-            if isinstance(value, str):
-                gen = self.generator.generate(value, copy_field_value, force=True)
-                if gen.startswith("@"):
-                    if gen.startswith("@../"):
-                        gen = os.path.normpath(os.path.join(self.directory, gen)).replace("\\", "/")
-                    else:
-                        gen = gen[1:]
-
-                return gen
-
-            elif isinstance(value, list):
-                new = []
-                for v in value:
-                    new.append(value_mapping(v, use_field_value))
-
-                return new
-
-            elif isinstance(value, dict):
-                new = {}
-                for k, v in value.items():
-                    if isinstance(v, str):
-                        new[k] = self.generator.generate(v, copy_field_value, force=True)
-                        if new[k].startswith("@"):
-                            if new[k].startswith("@../"):
-                                new[k] = os.path.normpath(os.path.join(self.directory, new[k])).replace("\\", "/")
-                            else:
-                                new[k] = new[k][1:]
-
-                    else:
-                        new[k] = value_mapping(v, use_field_value)
-
-                return new
+        value_mapping = self._value_mapping
 
-            return value
-        
         if override is None:
             return None
 
@@ -211,6 +450,9 @@ class StickyConfig(object):
             return value_mapping(override, use_field_value)
 
         elif isinstance(base, dict):
+            if stats.enabled:
+                stats.count("values_override.nodes", len(base))
+
             for k, v in base.items():
                 if k not in override:
                     override[k] = v
@@ -226,29 +468,29 @@ class StickyConfig(object):
 
         elif isinstance(base, list):
             override_ = []
-            if isinstance(base[0], dict) and "name" in base[0]:
-                override_keys = [value_["name"] for value_ in override]
+            if len(base) > 0 and isinstance(base[0], dict) and "name" in base[0]:
+                if stats.enabled:
+                    stats.count("values_override.list_merges")
+                    stats.count("values_override.nodes", len(base))
+
+                positions = {}
+                for i, each2 in enumerate(override):
+                    positions.setdefault(each2["name"], []).append(i)
 
-                rm = []
+                matched = set()
                 for each in base:
-                    if each["name"] in override_keys:
-                        for i, each2 in enumerate(override):
-                            if each["name"] == each2["name"]:
-                                dic = copy.deepcopy(each)
-                                for k, v in each2.items():
-                                    dic[k] = v
-
-                                override_.append(dic)
-                                rm.append(i)
+                    indices = positions.get(each["name"])
+                    if indices:
+                        for i in indices:
+                            dic = copy.deepcopy(each)
+                            dic.update(override[i])
+                            override_.append(dic)
+                            matched.add(i)
                     else:
                         override_.append(each)
 
-                rm.sort(reverse=True)
-                for r in rm:
-                    override.pop(r)
-
-                for each in override:
-                    override_.append(each)
+                override[:] = [each for i, each in enumerate(override) if i not in matched]
+                override_.extend(override)
                 return value_mapping([dic for dic in override_ if not dic.get("cancel", False)], self.field_value)
             else:
                 return value_mapping(override, self.field_value)
@@ -256,6 +498,109 @@ class StickyConfig(object):
         else:
             return value_mapping(override, self.field_value)
 
+    def _values_merge(self, base, override, use_field_value=False):
+        value_mapping = self._value_mapping
+
+        if override is None:
+            return None
+
+        elif type(base) != type(override):
+            return value_mapping(base, use_field_value)
+
+        elif isinstance(base, (int, float, bool)):
+            return value_mapping(override, use_field_value)
+
+        elif isinstance(base, dict):
+            if stats.enabled:
+                stats.count("values_override.nodes", len(base))
+
+            result = override
+            for k, v in base.items():
+                if k not in override:
+                    if result is override:
+                        result = dict(override)
+                    result[k] = v
+                else:
+                    override_value = self._values_merge(v, override[k], use_field_value)
+                    if override_value is None:
+                        print("override value is None. key: {}".format(k))
+                        if result is override:
+                            result = dict(override)
+                        del result[k]
+                    elif override_value is not override[k]:
+                        if result is override:
+                            result = dict(override)
+                        result[k] = override_value
+
+            return value_mapping(result, self.field_value)
+
+        elif isinstance(base, list):
+            if len(base) > 0 and isinstance(base[0], dict) and "name" in base[0]:
+                if stats.enabled:
+                    stats.count("values_override.list_merges")
+                    stats.count("values_override.nodes", len(base))
+
+                positions = {}
+                for i, each2 in enumerate(override):
+                    positions.setdefault(each2["name"], []).append(i)
+
+                result = []
+                matched = set()
+                for each in base:
+                    indices = positions.get(each["name"])
+                    if indices:
+                        for i in indices:
+                            dic = dict(each)
+                            dic.update(override[i])
+                            result.append(dic)
+                            matched.add(i)
+                    else:
+                        result.append(each)
+
+                result.extend(each for i, each in enumerate(override) if i not in matched)
+                return value_mapping([dic for dic in result if not dic.get("cancel", False)], self.field_value)
+            else:
+                return value_mapping(override, self.field_value)
+
+        else:
+            return value_mapping(override, self.field_value)
+
+    def _value_mapping(self, value, use_field_value):
+        """
+        generate field values in strings. containers are rebuilt only when some of their values are changed.
+        """
+        if not use_field_value:
+            return value
+
+        if isinstance(value, str):
+            gen = self.generator.generate(value, self.field_value, force=True)
+            if gen.startswith("@"):
+                if gen.startswith("@../"):
+                    gen = os.path.normpath(os.path.join(self.directory, gen)).replace("\\", "/")
+                else:
+                    gen = gen[1:]
+
+            return value if gen == value else gen
+
+        elif isinstance(value, list):
+            new = [self._value_mapping(v, use_field_value) for v in value]
+            if all(n is v for n, v in zip(new, value)):
+                return value
+
+            return new
+
+        elif isinstance(value, dict):
+            new = {}
+            changed = False
+            for k, v in value.items():
+                new[k] = self._value_mapping(v, use_field_value)
+                if new[k] is not v:
+                    changed = True
+
+            return new if changed else value
+
+        return value
+
     def trace_files(self, result_data, file_list):
         for each in file_list[::-1]:
             file_info, file_data = self.read(each)
@@ -302,24 +647,22 @@ class StickyConfig(object):
 
         elif isinstance(base, list):
             if len(base) > 0 and isinstance(base[0], dict) and "name" in base[0]:
+                data_dicts = {}
+                for each in data:
+                    data_dicts.setdefault(each["name"], each)
+
                 new_list = []
                 for base_ in base:
-                    is_exists = False
-                    new_dict = {}
-                    for each in data:
-                        if base_["name"] == each["name"]:
-                            keys = each.keys()
-                            for key in keys:
-                                new_dict[key] = _add_file_name(each[key], file_name)
-                            is_exists = True
-                            break
-
-                    if is_exists:
+                    each = data_dicts.get(base_["name"])
+                    if each is not None:
+                        new_dict = {}
+                        for key in each.keys():
+                            new_dict[key] = _add_file_name(each[key], file_name)
                         new_list.append(new_dict)
                     else:
                         new_list.append(base_)
 
-                base_keys = [v["name"].split(self.splitter)[0] for v in base]
+                base_keys = set(v["name"].split(self.splitter)[0] for v in base)
                 for each in data:
                     if each["name"] not in base_keys:
                         new_dict = {}
@@ -0,0 +1,106 @@
+#-*- coding: utf8 -*-
+"""
+asyncio API of StickyProjectManager. python 3.5+ only.
+
+    from sticky.StickyAsync import resolve
+    resolution = await resolve("projectA", "ep02", tool_name="toolA")
+    resolution.config
+
+files are found, read and merged in threads of an executor, so the event loop is not blocked.
+files of a chain are read concurrently, and concurrent requests of same context share one resolution.
+"""
+
+import asyncio
+import functools
+
+from sticky.StickyContext import StickyContext
+from sticky.StickyProjectManager import StickyProjectManager
+
+
+def _get_loop():
+    if hasattr(asyncio, "get_running_loop"):
+        return asyncio.get_running_loop()
+
+    return asyncio.get_event_loop()
+
+
+class AsyncResolver(object):
+    """
+    resolve contexts with a shared manager.
+    manager: StickyProjectManager (or subclass) used for file rules and caches.
+    executor: concurrent.futures executor for file access and merging. None uses the default executor of the loop.
+    """
+    def __init__(self, manager=None, executor=None):
+        self.manager = manager if manager is not None else StickyProjectManager()
+        self.executor = executor
+        self._pending = {}
+
+    def _run(self, loop, func, *args, **kwargs):
+        return loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def resolve(self, project, variation="default", tool_name=False, root_directory=None, select=None):
+        """
+        return Resolution of the context. config of the result is shared. copy it before modification.
+        """
+        return await self.resolve_context(StickyContext(project, variation, tool_name, root_directory), select=select)
+
+    async def resolve_context(self, context, select=None):
+        manager = self.manager
+        select = manager._select_key(select)
+        loop = _get_loop()
+        # key of a subclass has key config files found on the file system
+        key, key_config_files = await self._run(loop, manager._lookup_key, context)
+        key = manager._selected_key(key, select)
+
+        pending_key = (id(loop), key)
+        task = self._pending.get(pending_key)
+        if task is None:
+            task = asyncio.ensure_future(self._resolve(loop, key, context, select, key_config_files))
+            self._pending[pending_key] = task
+            task.add_done_callback(lambda done: self._pending.pop(pending_key, None))
+
+        # cancel of one caller does not cancel the resolution others wait for
+        return await asyncio.shield(task)
+
+    async def resolve_many(self, contexts, select=None):
+        return await asyncio.gather(*[self.resolve_context(each, select=select) for each in contexts])
+
+    async def _resolve(self, loop, key, context, select, key_config_files=None):
+        manager = self.manager
+        previous = None
+        if manager.use_resolution_cache:
+            resolution = await self._run(loop, manager.resolution_cache.get, key)
+            if resolution is not None:
+                return resolution
+            previous = manager.resolution_cache.peek(key)
+
+        files = await self._run(loop, manager._get_config_files, context, key_config_files)
+        start = manager._reusable_layers(previous, files[2])
+        docs = await asyncio.gather(*[self._run(loop, manager.sticky.read, path, copy=False, select=select)
+                                      for path in files[1][start:]])
+
+        resolution = await self._run(loop, manager._merge, files, [doc[1] for doc in docs], previous, start,
+                                      select=select)
+        if manager.use_resolution_cache:
+            manager.resolution_cache.put(key, resolution)
+
+        return resolution
+
+
+_resolver = None
+
+
+def get_resolver():
+    global _resolver
+    if _resolver is None:
+        _resolver = AsyncResolver()
+
+    return _resolver
+
+
+async def resolve(project, variation="default", tool_name=False, root_directory=None, select=None):
+    """
+    resolve with the shared AsyncResolver and a StickyProjectManager.
+    """
+    return await get_resolver().resolve(project, variation, tool_name=tool_name,
+                                        root_directory=root_directory, select=select)
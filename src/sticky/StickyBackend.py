@@ -0,0 +1,393 @@
+#-*- coding: utf8 -*-
+
+import os
+import re
+import json
+import codecs
+
+
+def select_tree(paths):
+    """
+    ["a.b", "a.c", "d"] -> {"a": {"b": {}, "c": {}}, "d": {}}. {} selects the whole value.
+    """
+    tree = {}
+    for path in paths:
+        node = tree
+        keys = path.split(".")
+        for i, key in enumerate(keys):
+            if key in node and not node[key]:
+                # the whole value is already selected
+                break
+
+            if i == len(keys) - 1:
+                node[key] = {}
+            else:
+                node = node.setdefault(key, {})
+
+    return tree
+
+
+def select_data(data, tree, keep_types=True):
+    """
+    values of data at the key paths of tree. dicts on the way keep only selected keys.
+    None on the way is kept, so a value canceled by an upper layer is canceled in merged results too.
+    keep_types: other values on the way are kept as markers of their type (lists as empty lists),
+        so selected layers merge to same types as whole layers (a mismatched type of an upper layer is ignored).
+        select the merged result again with keep_types=False to remove the markers.
+    """
+    result = {}
+    for key, sub in tree.items():
+        if key not in data:
+            continue
+
+        value = data[key]
+        if not sub:
+            result[key] = value
+        elif isinstance(value, dict):
+            result[key] = select_data(value, sub, keep_types)
+        elif value is None:
+            result[key] = None
+        elif keep_types:
+            result[key] = [] if isinstance(value, list) else value
+
+    return result
+
+
+class YamlBackend(object):
+    """
+    yaml reader/writer. libyaml based CSafeLoader/CSafeDumper are used when pyyaml was built with libyaml.
+    yaml is imported at the first use.
+    """
+    name = "yaml"
+
+    def __init__(self, use_libyaml=None):
+        self.use_libyaml = use_libyaml
+        self._loader = None
+        self._dumper = None
+
+    def _setup(self):
+        import yaml
+
+        use_libyaml = self.use_libyaml
+        if use_libyaml is None:
+            use_libyaml = getattr(yaml, "__with_libyaml__", False)
+
+        if use_libyaml and hasattr(yaml, "CSafeLoader"):
+            self._loader = yaml.CSafeLoader
+            self._dumper = yaml.CSafeDumper
+        else:
+            self._loader = yaml.SafeLoader
+            self._dumper = yaml.SafeDumper
+
+    @property
+    def loader(self):
+        if self._loader is None:
+            self._setup()
+        return self._loader
+
+    @property
+    def dumper(self):
+        if self._dumper is None:
+            self._setup()
+        return self._dumper
+
+    def load_file(self, path):
+        import yaml
+
+        with open(path, "rb") as f:
+            return yaml.load(f, Loader=self.loader)
+
+    def load_info(self, path, key="info"):
+        """
+        return value of the top level key without building other values.
+        other values are skipped at event level and parsing stops after the key is found.
+        """
+        import yaml
+
+        with open(path, "rb") as f:
+            loader = self.loader(f)
+            try:
+                events = self._find_events(loader, key)
+            finally:
+                loader.dispose()
+
+        if events is None:
+            raise KeyError(key)
+
+        events = [yaml.StreamStartEvent(), yaml.DocumentStartEvent()] + events + \
+                 [yaml.DocumentEndEvent(), yaml.StreamEndEvent()]
+        try:
+            return yaml.load(yaml.emit(events, Dumper=self.dumper), Loader=self.loader)
+        except yaml.YAMLError:
+            # e.g. alias of an anchor outside of the key
+            return self.load_file(path)[key]
+
+    def load_select(self, path, paths, key="data"):
+        """
+        return the document with only key paths of the top level key (data).
+        other top level keys (info) are loaded whole. values out of paths are skipped at event level.
+        """
+        import yaml
+
+        tree = select_tree(paths)
+        with open(path, "rb") as f:
+            loader = self.loader(f)
+            try:
+                events = self._select_document(loader, key, tree)
+            finally:
+                loader.dispose()
+
+        if events is None:
+            return self.load_file(path)
+
+        events = [yaml.StreamStartEvent(), yaml.DocumentStartEvent()] + events + \
+                 [yaml.DocumentEndEvent(), yaml.StreamEndEvent()]
+        try:
+            doc = yaml.load(yaml.emit(events, Dumper=self.dumper), Loader=self.loader)
+        except yaml.YAMLError:
+            # e.g. alias of an anchor in a skipped value
+            doc = self.load_file(path)
+
+        if isinstance(doc.get(key), dict):
+            doc[key] = select_data(doc[key], tree)
+
+        return doc
+
+    @classmethod
+    def _select_document(cls, loader, key, tree):
+        import yaml
+
+        loader.get_event()
+        if not loader.check_event(yaml.DocumentStartEvent):
+            return None
+
+        loader.get_event()
+        if not loader.check_event(yaml.MappingStartEvent):
+            return None
+
+        events = [loader.get_event()]
+        while not loader.check_event(yaml.MappingEndEvent):
+            key_events = cls._take_node(loader, True)
+            events.extend(key_events)
+            if len(key_events) == 1 and isinstance(key_events[0], yaml.ScalarEvent) and key_events[0].value == key:
+                events.extend(cls._select_node(loader, tree))
+            else:
+                events.extend(cls._take_node(loader, True))
+
+        events.append(loader.get_event())
+        return events
+
+    @classmethod
+    def _select_node(cls, loader, tree):
+        """
+        events of one node with only keys in tree. scalars on the way are kept as type markers of select_data,
+        and lists on the way are kept as empty lists.
+        """
+        import yaml
+
+        if not tree or not loader.check_event(yaml.MappingStartEvent):
+            return cls._take_node(loader, True)
+
+        events = [loader.get_event()]
+        while not loader.check_event(yaml.MappingEndEvent):
+            key_events = cls._take_node(loader, True)
+            name = key_events[0].value if len(key_events) == 1 and isinstance(key_events[0], yaml.ScalarEvent) else None
+            if name == "<<":
+                # merge key. the values are merged into this mapping
+                events.extend(key_events)
+                events.extend(cls._take_node(loader, True))
+            elif name in tree:
+                events.extend(key_events)
+                if tree[name] and loader.check_event(yaml.SequenceStartEvent):
+                    events.extend(cls._empty_sequence(loader))
+                else:
+                    events.extend(cls._select_node(loader, tree[name]))
+            else:
+                cls._take_node(loader, False)
+
+        events.append(loader.get_event())
+        return events
+
+    @classmethod
+    def _empty_sequence(cls, loader):
+        import yaml
+
+        start = loader.get_event()
+        while not loader.check_event(yaml.SequenceEndEvent):
+            cls._take_node(loader, False)
+        loader.get_event()
+
+        # without anchor, so an alias of the list fails and the whole file is loaded
+        return [yaml.SequenceStartEvent(None, start.tag, start.implicit, flow_style=True), yaml.SequenceEndEvent()]
+
+    @classmethod
+    def _find_events(cls, loader, key):
+        import yaml
+
+        loader.get_event()
+        if not loader.check_event(yaml.DocumentStartEvent):
+            return None
+
+        loader.get_event()
+        if not loader.check_event(yaml.MappingStartEvent):
+            return None
+
+        loader.get_event()
+        while not loader.check_event(yaml.MappingEndEvent):
+            key_events = cls._take_node(loader, True)
+            found = len(key_events) == 1 and isinstance(key_events[0], yaml.ScalarEvent) and key_events[0].value == key
+            events = cls._take_node(loader, found)
+            if found:
+                return events
+
+        return None
+
+    @staticmethod
+    def _take_node(loader, keep):
+        """
+        consume events of one node. return the events when keep is True.
+        """
+        import yaml
+
+        events = []
+        depth = 0
+        while True:
+            event = loader.get_event()
+            if keep:
+                events.append(event)
+            if isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)):
+                depth += 1
+            elif isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+                depth -= 1
+            if depth == 0:
+                return events
+
+    def dump_file(self, obj, path):
+        import yaml
+
+        # top level keys are written in order of obj, so "info" can be read before "data"
+        with codecs.open(path, "w", encoding="utf8") as f:
+            for key, value in obj.items():
+                yaml.dump({key: value}, f, Dumper=self.dumper, allow_unicode=True, default_flow_style=False)
+
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_BRACKET = re.compile(r'"(?:[^"\\]|\\.)*"|[\[\]{}]')
+
+
+class JsonBackend(object):
+    """
+    json reader/writer. loading uses orjson or ujson when one of them is installed,
+    and falls back to the standard json module for documents they can not decode.
+    writing always uses the standard json module to keep the file format.
+    """
+    name = "json"
+
+    def __init__(self, codec="auto"):
+        """
+        codec: module with loads(bytes). "auto" finds an installed one, None uses the standard json module only.
+        """
+        if codec == "auto":
+            codec = self.find_codec()
+        self.codec = codec
+
+    @staticmethod
+    def find_codec():
+        for name in ["orjson", "ujson"]:
+            try:
+                return __import__(name)
+            except ImportError:
+                pass
+
+        return None
+
+    def loads(self, data):
+        if self.codec is not None:
+            try:
+                return self.codec.loads(data)
+            except (ValueError, TypeError, OverflowError):
+                pass
+
+        return json.loads(data.decode("utf8"))
+
+    def load_file(self, path):
+        with open(path, "rb") as f:
+            return self.loads(f.read())
+
+    def load_info(self, path, key="info"):
+        """
+        return value of the top level key. other values are skipped by bracket matching without decoding,
+        and scanning stops after the key is found.
+        """
+        with open(path, "rb") as f:
+            text = f.read().decode("utf8")
+
+        decoder = json.JSONDecoder()
+        i = _WHITESPACE.match(text, 0).end()
+        if text[i:i + 1] != "{":
+            raise ValueError("top level of json is not an object: {}".format(path))
+
+        i += 1
+        while True:
+            i = _WHITESPACE.match(text, i).end()
+            if text[i:i + 1] in ("}", ""):
+                raise KeyError(key)
+
+            name, i = decoder.raw_decode(text, i)
+            i = _WHITESPACE.match(text, i).end() + 1
+            i = _WHITESPACE.match(text, i).end()
+            if name == key:
+                return decoder.raw_decode(text, i)[0]
+
+            i = self._skip_value(decoder, text, i)
+            i = _WHITESPACE.match(text, i).end()
+            if text[i:i + 1] == ",":
+                i += 1
+
+    @staticmethod
+    def _skip_value(decoder, text, i):
+        if text[i] not in "[{":
+            return decoder.raw_decode(text, i)[1]
+
+        depth = 0
+        for match in _BRACKET.finditer(text, i):
+            token = match.group()
+            if token in "[{":
+                depth += 1
+            elif token in "]}":
+                depth -= 1
+                if depth == 0:
+                    return match.end()
+
+        raise ValueError("unterminated json value")
+
+    def dump_file(self, obj, path):
+        with codecs.open(path, "w", encoding="utf8") as f:
+            json.dump(obj, f, ensure_ascii=False, indent=4)
+
+
+_backends = {}
+
+
+def register_backend(extension, backend):
+    if not extension.startswith("."):
+        extension = ".{}".format(extension)
+    _backends[extension.lower()] = backend
+
+
+def unregister_backend(extension):
+    if not extension.startswith("."):
+        extension = ".{}".format(extension)
+    return _backends.pop(extension.lower(), None)
+
+
+def get_backend(path):
+    return _backends.get(os.path.splitext(path)[1].lower(), None)
+
+
+def get_extensions():
+    return sorted(_backends.keys())
+
+
+register_backend(".yml", YamlBackend())
+register_backend(".json", JsonBackend())
@@ -0,0 +1,384 @@
+#-*- coding: utf8 -*-
+
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from sticky.StickyStats import stats
+from sticky.StickyIntern import Interner
+
+VERSION_FILE = re.compile(r"^(.+)\.v(\d+)\.yml$")
+
+
+def normalize_path(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def file_stamp(st):
+    return (getattr(st, "st_mtime_ns", st.st_mtime), st.st_size)
+
+
+def copy_tree(value):
+    """
+    copy dict and list containers of parsed data.
+    leaf values (str, int, float, bool, None) are immutable and shared.
+    """
+    if isinstance(value, dict):
+        return {k: copy_tree(v) for k, v in value.items()}
+
+    elif isinstance(value, list):
+        return [copy_tree(v) for v in value]
+
+    elif isinstance(value, tuple):
+        return tuple(copy_tree(v) for v in value)
+
+    return value
+
+
+def touch(entries, key, lock):
+    """
+    move key to the end of LRU order when the lock is free.
+    readers do not wait for a busy lock. the order is only left a little older.
+    """
+    if not lock.acquire(False):
+        return
+
+    try:
+        if hasattr(entries, "move_to_end"):
+            if key in entries:
+                entries.move_to_end(key)
+        else:
+            value = entries.pop(key, None)
+            if value is not None:
+                entries[key] = value
+    finally:
+        lock.release()
+
+
+class ParsedFileCache(object):
+    """
+    process-wide cache of parsed config files.
+    entries are keyed by normalized path and validated by (mtime, size) on every lookup,
+    so an edited file is parsed again on the next read.
+    least recently used entries are evicted when max_entries or max_bytes(sum of file sizes) is exceeded.
+    lookups of cached entries take no lock, so many threads can read at once.
+    """
+    def __init__(self, max_entries=512, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, path):
+        return normalize_path(path) in self._entries
+
+    def get(self, path, loader, copy=True):
+        """
+        return loader(path) result from cache. the file is parsed only when it is not cached or modified.
+        copy=False returns cached objects itself. caller must not modify them.
+        """
+        key = normalize_path(path)
+        try:
+            stamp = file_stamp(os.stat(key))
+        except OSError:
+            return loader(path)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == stamp:
+            self.hits += 1
+            touch(self._entries, key, self._lock)
+        else:
+            entry = None
+            self.misses += 1
+            entry = (stamp, loader(path))
+            self._put(key, entry)
+
+        if copy:
+            return copy_tree(entry[1])
+
+        return entry[1]
+
+    def peek(self, path):
+        """
+        return cached value without copy when it is cached and unchanged, otherwise None.
+        """
+        key = normalize_path(path)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        try:
+            stamp = file_stamp(os.stat(key))
+        except OSError:
+            return None
+
+        if entry[0] != stamp:
+            return None
+
+        return entry[1]
+
+    def _put(self, key, entry):
+        size = entry[0][1]
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[0][1]
+
+            self._entries[key] = entry
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or \
+                    (self.max_bytes is not None and self._bytes > self.max_bytes):
+                old_key, old = self._entries.popitem(last=False)
+                self._bytes -= old[0][1]
+
+    def invalidate(self, path):
+        key = normalize_path(path)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[0][1]
+                return True
+
+        return False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+
+class DirectoryIndex(object):
+    """
+    cache of directory listings. each listing is a frozenset of basenames validated by mtime of the directory,
+    so adding or removing files refreshes the listing on the next lookup.
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, directory):
+        key = normalize_path(directory)
+        mtime = file_stamp(os.stat(key))[0]
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == mtime:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        if stats.enabled:
+            stats.count("fs.listdir")
+
+        names = frozenset(os.listdir(key))
+        with self._lock:
+            self._entries[key] = (mtime, names)
+
+        return names
+
+    def invalidate(self, directory):
+        with self._lock:
+            return self._entries.pop(normalize_path(directory), None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class VersionIndex(object):
+    """
+    versions of "stem.vN.yml" files of directories. {stem: ((version, basename), ...)}
+    versions are sorted as numbers, so v10 comes after v9.
+    each directory is listed once and the index is validated by mtime of the directory.
+    stems are keys by normcase, so they are compared as the file system does (case-insensitive on windows).
+    """
+    # file names are compared with this. lower case on windows.
+    normcase = staticmethod(os.path.normcase)
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, directory):
+        """
+        return the index of directory. empty dict when the directory is missing.
+        """
+        key = normalize_path(directory)
+        try:
+            mtime = file_stamp(os.stat(key))[0]
+        except OSError:
+            return {}
+
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == mtime:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        if stats.enabled:
+            stats.count("fs.scandir")
+
+        versions = {}
+        for name in self._names(key):
+            match = VERSION_FILE.match(self.normcase(name))
+            if match:
+                versions.setdefault(match.group(1), []).append((int(match.group(2)), name))
+
+        index = dict((stem, tuple(sorted(each))) for stem, each in versions.items())
+        with self._lock:
+            self._entries[key] = (mtime, index)
+
+        return index
+
+    def _names(self, directory):
+        if not hasattr(os, "scandir"):
+            return os.listdir(directory)
+
+        it = os.scandir(directory)
+        try:
+            return [entry.name for entry in it]
+        finally:
+            if hasattr(it, "close"):
+                it.close()
+
+    def latest(self, directory, stem):
+        """
+        basename of the latest version of stem, or None.
+        """
+        versions = self.get(directory).get(self.normcase(stem))
+        return versions[-1][1] if versions else None
+
+    def invalidate(self, directory):
+        with self._lock:
+            return self._entries.pop(normalize_path(directory), None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def fingerprint(paths):
+    """
+    (path, mtime, size) of each path. missing path has None.
+    """
+    result = []
+    for path in paths:
+        try:
+            result.append((path,) + file_stamp(os.stat(path)))
+        except OSError:
+            result.append((path, None, None))
+
+    return tuple(result)
+
+
+class ResolutionCache(object):
+    """
+    cache of resolved configs of StickyProjectManager.
+    each value is stored with fingerprint of files it was made from, and get returns it only while
+    the fingerprint is unchanged.
+    interner is the table of StickyProjectManager.use_intern. it is cleared with the cache.
+    """
+    def __init__(self, max_entries=256, max_interned=100000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.interner = Interner(max_interned)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        return the value of key while files in value.fingerprint are unchanged, otherwise None.
+        """
+        value = self._entries.get(key)
+        if value is not None:
+            touch(self._entries, key, self._lock)
+
+        if value is not None and fingerprint([each[0] for each in value.fingerprint]) == value.fingerprint:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        return None
+
+    def peek(self, key):
+        """
+        return the value of key without checking fingerprint.
+        """
+        return self._entries.get(key)
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key=None, path=None):
+        """
+        remove the entry of key, or every entry made from path.
+        """
+        with self._lock:
+            if key is not None:
+                return [key] if self._entries.pop(key, None) is not None else []
+
+            path = normalize_path(path)
+            keys = [k for k, value in self._entries.items()
+                    if any(normalize_path(each[0]) == path for each in value.fingerprint)]
+            for k in keys:
+                del self._entries[k]
+
+            return keys
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+        self.interner.clear()
+
+
+file_cache = ParsedFileCache()
+info_cache = ParsedFileCache(max_entries=4096, max_bytes=None)
+directory_index = DirectoryIndex()
+version_index = VersionIndex()
+resolution_cache = ResolutionCache()
+
+
+def invalidate(path):
+    directory_index.invalidate(os.path.dirname(path))
+    version_index.invalidate(os.path.dirname(path))
+    info_cache.invalidate(path)
+    resolution_cache.invalidate(path=path)
+    return file_cache.invalidate(path)
+
+
+def clear_cache():
+    file_cache.clear()
+    info_cache.clear()
+    directory_index.clear()
+    version_index.clear()
+    resolution_cache.clear()
@@ -0,0 +1,16 @@
+#-*- coding: utf8 -*-
+
+from collections import namedtuple
+
+
+class StickyContext(namedtuple("StickyContext", ["project", "variation", "tool_name", "root_directory"])):
+    """
+    immutable values a config is resolved for.
+    StickyProjectManager.resolve(context) reads nothing from attributes set by StickyProjectManager.set,
+    so one manager and its caches can be shared by many threads.
+    root_directory None means root_directory of the manager.
+    """
+    __slots__ = ()
+
+    def __new__(cls, project, variation="default", tool_name=False, root_directory=None):
+        return super(StickyContext, cls).__new__(cls, project, variation, tool_name, root_directory)
@@ -0,0 +1,101 @@
+#-*- coding: utf8 -*-
+
+import os
+import sys
+import time
+import threading
+import importlib
+
+try:
+    reload
+except NameError:
+    if hasattr(importlib, "reload"):
+        # for py3.4+
+        from importlib import reload
+
+
+def get_source_file(module):
+    path = getattr(module, "__file__", None)
+    if not path:
+        return None
+
+    if path.endswith((".pyc", ".pyo")) and os.path.exists(path[:-1]):
+        path = path[:-1]
+
+    return path
+
+
+def get_mtime(path):
+    if path is None:
+        return None
+
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    return getattr(st, "st_mtime_ns", st.st_mtime)
+
+
+class HookRegistry(object):
+    """
+    keep custom modules used by FieldValueGenerator.generate(custom_module_path=...).
+    a module is imported once and reloaded only when mtime of its source file is changed.
+    the mtime is checked at most once per check_interval seconds.
+
+    custom module must have execute(keys, field_value) and may have execute_batch(keys, field_values)
+    which returns list of field_value.
+    """
+    def __init__(self, check_interval=1.0):
+        self.check_interval = check_interval
+        self.loads = 0
+        self._modules = {}
+        self._lock = threading.Lock()
+
+    def get(self, module_path):
+        entry = self._modules.get(module_path)
+        now = time.time()
+        if entry is not None:
+            if now - entry[2] < self.check_interval:
+                return entry[0]
+
+            mtime = get_mtime(entry[1])
+            if mtime == entry[3]:
+                entry[2] = now
+                return entry[0]
+
+        with self._lock:
+            if entry is None:
+                module = sys.modules.get(module_path)
+                if module is None:
+                    module = importlib.import_module(module_path)
+                else:
+                    module = reload(module)
+            else:
+                module = reload(entry[0])
+
+            self.loads += 1
+            source = get_source_file(module)
+            self._modules[module_path] = [module, source, now, get_mtime(source)]
+
+        return module
+
+    def execute(self, module_path, keys, field_value):
+        return self.get(module_path).execute(keys, field_value)
+
+    def execute_batch(self, module_path, keys, field_values):
+        module = self.get(module_path)
+        if hasattr(module, "execute_batch"):
+            return module.execute_batch(keys, field_values)
+
+        return [module.execute(keys, field_value) for field_value in field_values]
+
+    def forget(self, module_path=None):
+        with self._lock:
+            if module_path is None:
+                self._modules.clear()
+            else:
+                self._modules.pop(module_path, None)
+
+
+hooks = HookRegistry()
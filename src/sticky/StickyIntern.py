@@ -0,0 +1,129 @@
+#-*- coding: utf8 -*-
+
+import threading
+
+_LEAF_TYPES = (str, int, float, bool, type(None))
+try:
+    _LEAF_TYPES += (unicode, long)  # noqa: F821
+except NameError:
+    pass
+
+
+class _Bucket(list):
+    """
+    nodes of one hash
+    """
+
+
+class Interner(object):
+    """
+    hash-consing table of parsed and merged values.
+    equal strings and numbers are replaced by one object, and equal dicts, lists and tuples are replaced by
+    one node whose values are interned too, so configs of many contexts share their identical parts.
+
+    nodes are found by hash of ids of their interned items and compared by identity of the items,
+    so interning a tree visits each node once and the table keeps no copy of the items.
+    interned nodes are plain dicts and lists shared between trees. they must not be modified.
+
+    the table keeps every node it has interned alive, also nodes of merge states and of configs nobody uses any more,
+    so it can hold more memory than the configs themselves (each node costs its own size and up to a few hundred bytes of table).
+    the table is cleared when it has max_entries nodes. later values are shared among themselves only.
+    """
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._leaves = {}
+        self._nodes = {}
+        self._ids = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, value):
+        return id(value) in self._ids
+
+    def clear(self):
+        with self._lock:
+            self._leaves.clear()
+            self._nodes.clear()
+            self._ids.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def intern(self, value, memo=None):
+        """
+        return interned value equal to value. memo: dict of id -> interned value shared by calls for related trees.
+        """
+        with self._lock:
+            if len(self._nodes) >= self.max_entries:
+                self._leaves.clear()
+                self._nodes.clear()
+                self._ids.clear()
+
+            return self._intern(value, {} if memo is None else memo)
+
+    def _intern(self, value, memo):
+        if type(value) is str:
+            return self._leaves.setdefault(value, value)
+
+        if isinstance(value, _LEAF_TYPES):
+            key = (type(value), value)
+            leaf = self._leaves.get(key)
+            if leaf is None:
+                leaf = self._leaves[key] = value
+            return leaf
+
+        if id(value) in self._ids:
+            return value
+
+        found = memo.get(id(value))
+        if found is not None:
+            return found[1]
+
+        if isinstance(value, dict):
+            items = [(self._intern(k, memo), self._intern(v, memo)) for k, v in value.items()]
+            key = (dict, len(items), hash(tuple(id(each) for item in items for each in item)))
+        elif isinstance(value, (list, tuple)):
+            items = [self._intern(v, memo) for v in value]
+            key = (type(value), len(items), hash(tuple(id(v) for v in items)))
+        else:
+            # unknown types are kept as they are
+            return value
+
+        # nodes of same hash are compared by identity of their items
+        found = self._nodes.get(key)
+        candidates = () if found is None else found if type(found) is _Bucket else (found,)
+        node = None
+        for each in candidates:
+            if self._same(each, items):
+                node = each
+                break
+
+        if node is None:
+            self.misses += 1
+            node = dict(items) if key[0] is dict else key[0](items)
+            if found is None:
+                self._nodes[key] = node
+            elif type(found) is _Bucket:
+                found.append(node)
+            else:
+                self._nodes[key] = _Bucket([found, node])
+            self._ids.add(id(node))
+        else:
+            self.hits += 1
+
+        # value is kept in memo, so its id is not reused while memo is alive
+        memo[id(value)] = (value, node)
+        return node
+
+    @staticmethod
+    def _same(node, items):
+        if len(node) != len(items):
+            return False
+
+        if isinstance(node, dict):
+            return all(k is k2 and v is v2 for (k, v), (k2, v2) in zip(node.items(), items))
+
+        return all(v is v2 for v, v2 in zip(node, items))
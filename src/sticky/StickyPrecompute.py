@@ -0,0 +1,178 @@
+#-*- coding: utf8 -*-
+"""
+resolve every project, variation and tool of a root directory with a process pool and write snapshot files.
+
+    python -m sticky.StickyPrecompute sample/env build/snapshots -j 8
+
+summary.json of the output directory has timings and failures.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+import traceback
+import multiprocessing
+
+from sticky.StickyContext import StickyContext
+from sticky.StickyProjectManager import StickyProjectManager
+from sticky.StickyCache import version_index
+
+
+def enumerate_contexts(root_directory, tools=None):
+    """
+    contexts of every combination found in the file names of root_directory.
+    file names are base(.variation), project(.variation), tool, tool.project and tool.project.variation.
+    tools: names of tools. by default, names used in tool.project.variation files are tools.
+    a tool with only "tool" or "tool.project" files can not be told from a project, so pass tools for them.
+    """
+    # stems as written in file names. keys of the index are normcased, which keeps their length.
+    stems = set(tuple(versions[-1][1][:len(stem)].split("."))
+                for stem, versions in version_index.get(root_directory).items())
+
+    tools = set(tools) if tools is not None else set(parts[0] for parts in stems if len(parts) == 3)
+    projects = set()
+    base_variations = set(["default"])
+    variations = {}
+    for parts in stems:
+        if parts[0] == "base":
+            if len(parts) == 2:
+                base_variations.add(parts[1])
+        elif parts[0] in tools:
+            if len(parts) > 1:
+                projects.add(parts[1])
+            if len(parts) > 2:
+                variations.setdefault(parts[1], set()).add(parts[2])
+        elif len(parts) <= 2:
+            projects.add(parts[0])
+            if len(parts) == 2:
+                variations.setdefault(parts[0], set()).add(parts[1])
+
+    contexts = []
+    for project in sorted(projects):
+        for variation in sorted(base_variations | variations.get(project, set())):
+            for tool_name in [False] + sorted(tools):
+                contexts.append(StickyContext(project, variation, tool_name, root_directory))
+
+    return contexts
+
+
+def snapshot_name(context):
+    parts = [context.project, context.variation]
+    if context.tool_name:
+        parts.insert(0, context.tool_name)
+
+    return "{}.snap".format(".".join(parts))
+
+
+def resolve_context(args):
+    """
+    resolve one context and write its snapshot. runs in worker processes.
+    return dict of the result. errors are returned, not raised.
+    """
+    manager_class, context, output_directory = args
+    result = {"project": context.project, "variation": context.variation, "tool_name": context.tool_name,
+              "snapshot": None, "config_files": 0, "seconds": 0.0, "error": None}
+
+    start = time.time()
+    try:
+        manager = manager_class()
+        manager.root_directory = context.root_directory
+        manager.set(context.project, context.variation, tool_name=context.tool_name)
+        result["config_files"] = len(manager.config_files)
+        if output_directory:
+            path = "{}/{}".format(output_directory, snapshot_name(context))
+            manager.compile(path)
+            result["snapshot"] = path
+    except Exception:
+        result["error"] = traceback.format_exc()
+
+    result["seconds"] = time.time() - start
+    return result
+
+
+def precompute(root_directory, output_directory=None, contexts=None, processes=None,
+               manager_class=StickyProjectManager, chunk_size=8):
+    """
+    resolve contexts (every context of root_directory by default) with processes and
+    write snapshot files and summary.json to output_directory.
+    processes: number of worker processes. None uses every core, 1 runs in this process.
+    return the summary dict.
+    """
+    if contexts is None:
+        contexts = enumerate_contexts(root_directory)
+
+    contexts = [each if each.root_directory is not None else each._replace(root_directory=root_directory)
+                for each in contexts]
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = max(1, min(processes, len(contexts)))
+
+    if output_directory and not os.path.exists(output_directory):
+        os.makedirs(output_directory)
+
+    start = time.time()
+    args = [(manager_class, each, output_directory) for each in contexts]
+    if processes == 1:
+        results = [resolve_context(each) for each in args]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = pool.map(resolve_context, args, chunk_size)
+        finally:
+            pool.close()
+            pool.join()
+
+    seconds = [each["seconds"] for each in results]
+    summary = {"root_directory": root_directory,
+               "output_directory": output_directory,
+               "processes": processes,
+               "contexts": len(results),
+               "failed": sum(1 for each in results if each["error"]),
+               "seconds": time.time() - start,
+               "max_seconds": max(seconds) if seconds else 0.0,
+               "total_seconds": sum(seconds),
+               "results": results}
+
+    if output_directory:
+        with open("{}/summary.json".format(output_directory), "w") as f:
+            json.dump(summary, f, indent=2)
+
+    return summary
+
+
+def import_class(path):
+    """
+    "package.module:ClassName"
+    """
+    module_name, class_name = path.split(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="resolve every context of a root directory and write snapshots.")
+    parser.add_argument("root_directory")
+    parser.add_argument("output_directory")
+    parser.add_argument("-j", "--processes", type=int, default=None, help="worker processes. every core by default.")
+    parser.add_argument("-t", "--tool", action="append", dest="tools", default=None, help="tool name. repeatable.")
+    parser.add_argument("-m", "--manager", default=None, help="manager class. package.module:ClassName")
+    args = parser.parse_args(argv)
+
+    manager_class = import_class(args.manager) if args.manager else StickyProjectManager
+    contexts = enumerate_contexts(args.root_directory, tools=args.tools)
+    summary = precompute(args.root_directory, args.output_directory, contexts=contexts,
+                         processes=args.processes, manager_class=manager_class)
+
+    print("{} contexts, {} failed, {:.3f} sec with {} processes".format(
+        summary["contexts"], summary["failed"], summary["seconds"], summary["processes"]))
+    for each in summary["results"]:
+        if each["error"]:
+            print("failed: {} {} {}".format(each["project"], each["variation"], each["tool_name"] or ""))
+
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
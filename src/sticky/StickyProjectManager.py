@@ -1,8 +1,27 @@
 #-*-coding: utf-8-*-
 
 import os
-import glob
+import copy
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+
 from sticky.Sticky import FieldValueGenerator, StickyConfig
+from sticky.StickyCache import resolution_cache, version_index, fingerprint, copy_tree
+from sticky.StickyView import LazyConfig
+from sticky.StickyBackend import select_tree, select_data
+from sticky.StickySnapshot import compile_snapshot, load_snapshot
+from sticky.StickyProvenance import Provenance
+from sticky.StickyContext import StickyContext
+from sticky.StickyStats import stats
+
+
+def _overridden(manager, name):
+    method = getattr(type(manager), name)
+    original = getattr(StickyProjectManager, name)
+    return getattr(method, "__func__", method) is not getattr(original, "__func__", original)
+
+
+Resolution = namedtuple("Resolution", ["key_config_files", "config_files", "config", "fingerprint", "states", "provenance"])
 
 
 class StickyProjectManager(object):
@@ -10,46 +29,325 @@ class StickyProjectManager(object):
     This class is used to manage project environment.
     In order to use this class, I recommand to Inheritance this class and override the get_key_config_files method.
     """
+    use_resolution_cache = True
+    # share equal values and subtrees of resolved configs of every context. for processes keeping many contexts.
+    # config of set is the shared one then, so it must not be modified. copy_tree it before modification.
+    # nodes are kept by interner of the resolution cache until it is cleared. see StickyIntern.Interner.
+    use_intern = False
+
     def __init__(self):
         self.root_directory = "sample/env"
         self.field_value_generator = FieldValueGenerator()
         self.sticky = StickyConfig()
+        self.resolution_cache = resolution_cache
+        # None uses interner of resolution_cache
+        self.interner = None
+
+    def get_context(self):
+        return StickyContext(self.project, self.variation, self.tool_name, self.root_directory)
+
+    def get_context_key(self, context):
+        """
+        key of resolution cache for the context.
+        """
+        return self._context_key(context)[0]
+
+    def _context_key(self, context):
+        """
+        (key, key config files found to make the key or None).
+        the files are passed to _get_config_files, so the file rule runs once for each lookup.
+        """
+        root_directory = self.root_directory if context.root_directory is None else context.root_directory
+        key = (self.__class__, root_directory, context.project, context.variation, context.tool_name)
+        if _overridden(self, "get_key_config_files") or _overridden(self, "find_key_config_files"):
+            # file rule of subclass may depend on other attributes, so the files it finds are a part of the key
+            key_config_files = self.find_key_config_files(context)
+            return key + (tuple(key_config_files),), key_config_files
+
+        return key, None
+
+    def _lookup_key(self, context, own=False):
+        """
+        own: key of the context of this manager (get_resolution_key).
+        """
+        if (own and _overridden(self, "get_resolution_key")) or _overridden(self, "get_context_key"):
+            return (self.get_resolution_key() if own else self.get_context_key(context)), None
+
+        return self._context_key(context)
+
+    def get_resolution_key(self):
+        """
+        key of resolution cache. key config files found by an overridden get_key_config_files are a part of it.
+        """
+        return self.get_context_key(self.get_context())
 
     def set(self, project, variation="default", **kwargs):
+        """
+        kwargs:
+            tool_name: name of tool config files
+            lazy: set LazyConfig to self.config. keys are merged when they are accessed.
+            trace: record which file set each value to self.provenance.
+            select: key paths of config. ["general.resolution", "playblast"]
+                config has only the values at the paths, and other values of the files are not built.
+        """
+        self.project = project
+        self.variation = variation
+        self.tool_name = kwargs.get("tool_name", False)
+        self.select = self._select_key(kwargs.get("select"))
+        trace = kwargs.get("trace", False)
+        self.provenance = None
+
+        if kwargs.get("lazy", False):
+            self._set_lazy()
+            return
+
+        with stats.span("manager.set", project=project, variation=variation, tool_name=self.tool_name):
+            context = self.get_context()
+            key, key_config_files = self._lookup_key(context, own=True)
+            resolution = self._get_resolution(self._selected_key(key, self.select), context, trace, self.select,
+                                              key_config_files)
+
+        self.resolution = resolution
+        self.provenance = resolution.provenance
+        self.key_config_files = list(resolution.key_config_files)
+        self.config_files = list(resolution.config_files)
+        # merged config shares values with cached files. copy once here, so self.config can be modified.
+        self.config = resolution.config if self.use_intern else copy_tree(resolution.config)
+
+    def resolve(self, context, trace=False, select=None):
+        """
+        return Resolution of the context without changing attributes of this manager.
+        safe to call from many threads. config of the result is shared. copy it before modification.
+        """
+        select = self._select_key(select)
+        key, key_config_files = self._lookup_key(context)
+        return self._get_resolution(self._selected_key(key, select), context, trace, select, key_config_files)
+
+    def resolve_many(self, contexts, threads=None):
+        """
+        resolve contexts with a thread pool and return Resolutions in the same order.
+        """
+        contexts = list(contexts)
+        if threads == 1 or len(contexts) < 2:
+            return [self.resolve(each) for each in contexts]
+
+        pool = ThreadPool(threads or min(len(contexts), 8))
+        try:
+            return pool.map(self.resolve, contexts)
+        finally:
+            pool.close()
+            pool.join()
+
+    @staticmethod
+    def _select_key(select):
+        return None if select is None else tuple(sorted(set(select)))
+
+    @staticmethod
+    def _selected_key(key, select):
+        # resolutions of a part of config are cached apart from the whole one
+        return key if select is None else key + (("select",) + select,)
+
+    def _get_resolution(self, key, context, trace=False, select=None, key_config_files=None):
+        if not self.use_resolution_cache:
+            return self._resolve(context, trace=trace, select=select, key_config_files=key_config_files)
+
+        resolution = self.resolution_cache.get(key)
+        if resolution is None or (trace and resolution.provenance is None):
+            resolution = self._resolve(context, self.resolution_cache.peek(key), trace=trace, select=select,
+                                       key_config_files=key_config_files)
+            self.resolution_cache.put(key, resolution)
+
+        return resolution
+
+    def _set_lazy(self):
+        context = self.get_context()
+        key, key_config_files = self._lookup_key(context, own=True)
+        resolution = None
+        if self.use_resolution_cache:
+            resolution = self.resolution_cache.get(self._selected_key(key, self.select))
+
+        if resolution is not None:
+            key_config_files, config_files = resolution.key_config_files, resolution.config_files
+            layers = [resolution.config]
+        else:
+            key_config_files, config_files, files_fingerprint = self._get_config_files(context, key_config_files)
+            layers = [self.sticky.read(each, copy=False, select=self.select)[1] for each in config_files]
+            resolution = Resolution(tuple(key_config_files), tuple(config_files), None, files_fingerprint, (), None)
+
+        self.resolution = resolution
+
+        self.key_config_files = list(key_config_files)
+        self.config_files = list(config_files)
+        self.config = LazyConfig(layers, self.sticky, None if self.select is None else select_tree(self.select))
+
+    def get_snapshot_context(self):
+        context = (self.root_directory, self.project, self.variation, self.tool_name)
+        if getattr(self, "select", None) is not None:
+            context += (self.select,)
+        return context
+
+    def compile(self, path):
+        """
+        write current config to a snapshot file. call this after set.
+        """
+        config = self.config.to_dict() if isinstance(self.config, LazyConfig) else self.config
+        return compile_snapshot(path, config, self.config_files, self.resolution.fingerprint,
+                                key_config_files=self.key_config_files,
+                                context=self.get_snapshot_context())
+
+    def load_snapshot(self, path, project, variation="default", **kwargs):
+        """
+        set config from the snapshot file. when the snapshot is missing, made for other context or
+        stale (config files were changed, added or removed), config is resolved by set and the snapshot is rebuilt.
+        kwargs are same as set. lazy wraps config of the snapshot in LazyConfig.
+        snapshots have no provenance, so trace resolves config by set without the snapshot.
+        return True when the snapshot was used.
+        """
         self.project = project
         self.variation = variation
         self.tool_name = kwargs.get("tool_name", False)
-        self.key_config_files = self.get_key_config_files()
-        self.config_files = []
+        self.select = self._select_key(kwargs.get("select"))
+        self.provenance = None
+
+        if kwargs.get("trace", False):
+            self.set(project, variation, **kwargs)
+            return False
+
+        snapshot = load_snapshot(path, context=self.get_snapshot_context())
+        if snapshot is None:
+            self.set(project, variation, **kwargs)
+            self.compile(path)
+            return False
+
+        self.resolution = Resolution(tuple(snapshot["key_config_files"]), tuple(snapshot["config_files"]),
+                                     None, snapshot["fingerprint"], (), None)
+        self.key_config_files = snapshot["key_config_files"]
+        self.config_files = snapshot["config_files"]
+        self.config = LazyConfig([snapshot["config"]], self.sticky) if kwargs.get("lazy", False) else snapshot["config"]
+        return True
+
+    def _get_config_files(self, context, key_config_files=None):
+        """
+        key_config_files: files found by _context_key. they are a part of the key, so files found before
+        the fingerprint are not cached for another listing.
+        """
+        # fingerprint is taken before reading, so changes while reading make the result stale
+        root_directory = self.root_directory if context.root_directory is None else context.root_directory
+        root_fingerprint = fingerprint([root_directory])
+        if key_config_files is None:
+            key_config_files = self.find_key_config_files(context)
+        config_files = []
+
+        for key_config_file in key_config_files:
+            config_files.extend(self.sticky.get_override_file_list(key_config_file))
+
+        config_files = [os.path.normpath(l).replace("\\", "/") for l in config_files]
+        return key_config_files, config_files, root_fingerprint + fingerprint(config_files)
+
+    def _resolve(self, context, previous=None, trace=False, select=None, key_config_files=None):
+        """
+        previous: stale Resolution of same context. merged results of its unchanged bottom layers are reused,
+        and only layers from the first changed file are merged again.
+        layers are merged without copy or modification, so states share values with cached files.
+        trace: record provenance while merging. every layer is merged again to record it.
+        select: key paths. only the values at the paths are read and merged.
+        key_config_files: files found to make the key.
+        """
+        with stats.span("manager.config_files"):
+            files = self._get_config_files(context, key_config_files)
 
-        for key_config_file in self.key_config_files:
-            self.config_files.extend(self.sticky.get_override_file_list(key_config_file))
+        start = self._reusable_layers(previous, files[2], trace)
+        with stats.span("manager.read", layers=len(files[1]) - start):
+            layers = [self.sticky.read(each, copy=False, select=select)[1] for each in files[1][start:]]
 
-        self.config_files = [os.path.normpath(l).replace("\\", "/") for l in self.config_files]
-        self.config = {}
-        for each in self.config_files:
-            override_info, override_data = self.sticky.read(each)
-            self.config = self.sticky.values_override(self.config, override_data)
+        return self._merge(files, layers, previous, start, trace, select)
+
+    @staticmethod
+    def _reusable_layers(previous, files_fingerprint, trace=False):
+        """
+        number of bottom layers of previous whose files are unchanged.
+        """
+        start = 0
+        if previous is not None and not trace:
+            for old, new in zip(previous.fingerprint[1:], files_fingerprint[1:]):
+                if old != new:
+                    break
+                start += 1
+
+        return start
+
+    def _merge(self, files, layers, previous=None, start=0, trace=False, select=None):
+        """
+        files: result of _get_config_files. layers: data of config files from start.
+        merge layers onto the state of previous at start and return Resolution.
+        select: key paths the layers were read with. type markers on the way are kept in states and removed from config.
+        """
+        key_config_files, config_files, files_fingerprint = files
+        states = list(previous.states[:start]) if start else []
+        provenance = Provenance(config_files) if trace else None
+
+        if stats.enabled:
+            stats.count("manager.resolves")
+            stats.count("manager.layers_merged", len(layers))
+
+        config = states[-1] if states else {}
+        with stats.span("manager.merge", layers=len(layers)):
+            for override_data in layers:
+                config = self.sticky.values_override(config, override_data, inplace=False)
+                states.append(config)
+                if provenance is not None:
+                    provenance.record(override_data, len(states) - 1, config)
+
+        if select is not None:
+            config = select_data(config, select_tree(select), keep_types=False)
+
+        if self.use_intern:
+            # states of unchanged layers are interned already and returned as they are
+            memo = {}
+            interner = self.resolution_cache.interner if self.interner is None else self.interner
+            states = [interner.intern(each, memo) for each in states]
+            config = interner.intern(config, memo)
+
+        return Resolution(tuple(key_config_files), tuple(config_files), config, files_fingerprint, tuple(states), provenance)
 
     def get_key_config_files(self):
-        def _get(path):
-            if path:
-                paths = glob.glob(path)
-                if len(paths) > 0:
-                    paths.sort()
-                    return os.path.normpath(paths[-1])
+        return self._default_key_config_files(self.get_context())
+
+    def find_key_config_files(self, context):
+        """
+        key config files of the context. override this (or get_key_config_files) to change the file rule.
+        """
+        if _overridden(self, "get_key_config_files"):
+            # get_key_config_files of subclass reads attributes. a copy is used, so self is not changed.
+            manager = copy.copy(self)
+            manager.project, manager.variation, manager.tool_name = context.project, context.variation, context.tool_name
+            if context.root_directory is not None:
+                manager.root_directory = context.root_directory
+            return manager.get_key_config_files()
+
+        return self._default_key_config_files(context)
+
+    def _default_key_config_files(self, context):
+        root_directory = self.root_directory if context.root_directory is None else context.root_directory
+        # "stem.vN.yml" files of root_directory. listed once while the directory is unchanged.
+        versions = version_index.get(root_directory)
+
+        def _get(stem):
+            found = versions.get(version_index.normcase(stem))
+            if found:
+                return os.path.normpath("{}/{}".format(root_directory, found[-1][1]))
 
             return False
 
-        project_pattern = "{}/{}.v*.yml".format(self.root_directory, self.project)
-        base_project_pattern = "{}/base.v*.yml".format(self.root_directory)
-        variation_pattern = "{}/{}.{}.v*.yml".format(self.root_directory, self.project, self.variation)
-        base_variation_pattern = "{}/base.{}.v*.yml".format(self.root_directory, self.variation)
+        project_pattern = context.project
+        base_project_pattern = "base"
+        variation_pattern = "{}.{}".format(context.project, context.variation)
+        base_variation_pattern = "base.{}".format(context.variation)
         tool_patterns = []
-        if self.tool_name:
-            tool_patterns.append("{}/{}.v*.yml".format(self.root_directory, self.tool_name))
-            tool_patterns.append("{}/{}.{}.v*.yml".format(self.root_directory, self.tool_name, self.project))
-            tool_patterns.append("{}/{}.{}.{}.v*.yml".format(self.root_directory, self.tool_name, self.project, self.variation))
+        if context.tool_name:
+            tool_patterns.append(context.tool_name)
+            tool_patterns.append("{}.{}".format(context.tool_name, context.project))
+            tool_patterns.append("{}.{}.{}".format(context.tool_name, context.project, context.variation))
 
         config_files = []
         temp_files = []
@@ -59,7 +357,7 @@ class StickyProjectManager(object):
                 temp_files.append(path)
         
         if len(temp_files) == 0:
-            raise Exception("No config file was found.: {}".format(self.root_directory))
+            raise Exception("No config file was found.: {}".format(root_directory))
         config_files.append(temp_files[-1].replace("\\", "/"))
 
         if len(tool_patterns) > 0:
@@ -0,0 +1,215 @@
+#-*- coding: utf8 -*-
+
+
+def short_name(path):
+    return "/".join(path.replace("\\", "/").split("/")[-2:])
+
+
+def is_named_list(value):
+    return isinstance(value, list) and len(value) > 0 and isinstance(value[0], dict) and "name" in value[0]
+
+
+class Provenance(object):
+    """
+    which file set each value of a merged config.
+    files are stored once and values refer them by index (file id).
+    key paths are tuples of keys. an item of a list of dicts with "name" key is addressed by its name,
+    and other lists are one value.
+
+    record is called after each layer is merged, so no file is read again to trace values.
+
+    origin and layers_touching answer queries with an index of dotted key paths built once at the first query.
+    """
+    def __init__(self, files=()):
+        self.files = list(files)
+        # key -> [file id, children, ids of files which set values at or under the key]
+        self._root = {}
+        self._index = None
+
+    @classmethod
+    def from_layers(cls, files, layers, sticky=None):
+        """
+        merge layers (data of files) and return (config, provenance).
+        """
+        if sticky is None:
+            from sticky.Sticky import StickyConfig
+            sticky = StickyConfig()
+
+        provenance = cls(files)
+        config = {}
+        for file_id, data in enumerate(layers):
+            config = sticky.values_override(config, data, inplace=False)
+            provenance.record(data, file_id, config)
+
+        return config, provenance
+
+    def add_file(self, path):
+        self.files.append(path)
+        return len(self.files) - 1
+
+    def record(self, data, file_id, result):
+        """
+        data: values of the layer. result: merged config after the layer.
+        """
+        self._index = None
+        self._record(self._root, data, file_id, result)
+
+    def _record(self, nodes, data, file_id, result):
+        if isinstance(data, dict):
+            for k, v in data.items():
+                if k not in result:
+                    # canceled by None
+                    nodes.pop(k, None)
+                    continue
+                self._record_value(nodes, k, v, file_id, result[k])
+
+        else:
+            results = dict((each.get("name"), each) for each in result)
+            for each in data:
+                name = each.get("name")
+                if name not in results:
+                    nodes.pop(name, None)
+                    continue
+                self._record_value(nodes, name, each, file_id, results[name])
+
+    def _record_value(self, nodes, key, value, file_id, result):
+        if type(value) != type(result):
+            # value of lower layer is kept
+            return
+
+        node = nodes.get(key)
+        if isinstance(value, dict) or (is_named_list(value) and is_named_list(result)):
+            if node is None or node[1] is None:
+                node = nodes[key] = [None, {}, set()]
+            node[2].add(file_id)
+            self._record(node[1], value, file_id, result)
+        else:
+            nodes[key] = [file_id, None, set([file_id]) if node is None else node[2] | set([file_id])]
+
+    def _find(self, path):
+        nodes = self._root
+        node = None
+        for key in path:
+            if nodes is None or key not in nodes:
+                return None
+            node = nodes[key]
+            nodes = node[1]
+
+        return node
+
+    def file_id(self, path):
+        """
+        file id of the value at key path. None for unknown path or a dict.
+        """
+        node = self._find(tuple(path))
+        return None if node is None else node[0]
+
+    def file_of(self, path):
+        file_id = self.file_id(path)
+        return None if file_id is None else self.files[file_id]
+
+    def items(self):
+        """
+        yield (key path, file id) of every value.
+        """
+        stack = [((), self._root)]
+        while stack:
+            path, nodes = stack.pop()
+            for key, node in nodes.items():
+                if node[1] is None:
+                    yield path + (key,), node[0]
+                else:
+                    stack.append((path + (key,), node[1]))
+
+    def __len__(self):
+        return sum(1 for each in self.items())
+
+    @staticmethod
+    def dotted(path):
+        if isinstance(path, (tuple, list)):
+            return ".".join("{}".format(key) for key in path)
+        return path
+
+    @property
+    def index(self):
+        """
+        {dotted key path: node}. "" is the root.
+        """
+        if self._index is None:
+            touched = set()
+            for node in self._root.values():
+                touched |= node[2]
+            index = {"": [None, self._root, touched]}
+            stack = [("", self._root)]
+            while stack:
+                prefix, nodes = stack.pop()
+                for key, node in nodes.items():
+                    path = "{}.{}".format(prefix, key) if prefix else "{}".format(key)
+                    index[path] = node
+                    if node[1] is not None:
+                        stack.append((path, node[1]))
+            self._index = index
+
+        return self._index
+
+    def origin(self, path):
+        """
+        file which set the value at the key path. "render.resolution.width" or ("render", "resolution", "width").
+        None for unknown path or a dict.
+        """
+        node = self.index.get(self.dotted(path))
+        if node is None or node[0] is None:
+            return None
+
+        return self.files[node[0]]
+
+    def layers_touching(self, prefix=""):
+        """
+        files which set any value at or under the key path, in merge order.
+        values overridden by upper layers are counted too.
+        """
+        node = self.index.get(self.dotted(prefix))
+        if node is None:
+            return []
+
+        return [self.files[file_id] for file_id in sorted(node[2])]
+
+    def render(self, config, splitter="--->"):
+        """
+        copy of config with "value--->directory/file.yml" strings. same format as StickyConfig.trace_files,
+        except canceled items of named lists. trace_files appends them ({"name": "c--->file", "cancel": "True--->file"}),
+        and render leaves them out like config does.
+        """
+        names = [short_name(path) for path in self.files]
+        return self._render(config, self._root, names, splitter)
+
+    def _render(self, value, nodes, names, splitter, file_id=None):
+        if isinstance(value, dict):
+            new = {}
+            for k, v in value.items():
+                node = nodes.get(k) if nodes else None
+                new[k] = self._render(v, node[1] if node else None, names, splitter,
+                                      node[0] if node else file_id)
+            return new
+
+        elif is_named_list(value) and nodes:
+            new = []
+            for each in value:
+                node = nodes.get(each["name"])
+                new.append(self._render(each, node[1] if node else None, names, splitter,
+                                        node[0] if node else file_id))
+            return new
+
+        elif isinstance(value, list):
+            return [self._render(v, None, names, splitter, file_id) for v in value]
+
+        if file_id is None:
+            return value
+
+        if isinstance(value, (int, float, bool)):
+            value = str(value)
+
+        if isinstance(value, str) and splitter not in value:
+            value = "{}{}{}".format(value, splitter, names[file_id])
+
+        return value
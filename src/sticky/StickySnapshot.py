@@ -0,0 +1,100 @@
+#-*- coding: utf8 -*-
+"""
+resolved config written in a binary file to load it at tool startup without globbing, parsing and merging.
+this module does not import yaml.
+"""
+
+import os
+import marshal
+import pickle
+
+from sticky.StickyCache import fingerprint
+
+MAGIC = b"STICKYSNAP1\n"
+MARSHAL = b"m"
+PICKLE = b"p"
+
+
+def compile_snapshot(path, config, config_files, files_fingerprint, key_config_files=(), context=None):
+    """
+    write snapshot file.
+    files_fingerprint: fingerprint of files (and directories) the config was made from.
+    it is checked when the snapshot is loaded.
+    """
+    snapshot = {"context": context,
+                "key_config_files": list(key_config_files),
+                "config_files": list(config_files),
+                "fingerprint": tuple(tuple(each) for each in files_fingerprint),
+                "config": config}
+
+    try:
+        kind, payload = MARSHAL, marshal.dumps(snapshot)
+    except ValueError:
+        # values marshal does not support. e.g. datetime of yaml timestamp
+        kind, payload = PICKLE, pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    temp = "{}.{}.tmp".format(path, os.getpid())
+    with open(temp, "wb") as f:
+        f.write(MAGIC + kind + payload)
+
+    if hasattr(os, "replace"):
+        os.replace(temp, path)
+    else:
+        if os.path.exists(path):
+            os.remove(path)
+        os.rename(temp, path)
+
+    return snapshot
+
+
+def read_snapshot(path):
+    """
+    return snapshot dict, or None when the file is missing or not a snapshot.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except (IOError, OSError):
+        return None
+
+    if not data.startswith(MAGIC):
+        return None
+
+    kind = data[len(MAGIC):len(MAGIC) + 1]
+    payload = data[len(MAGIC) + 1:]
+    try:
+        if kind == MARSHAL:
+            return marshal.loads(payload)
+        elif kind == PICKLE:
+            return pickle.loads(payload)
+    except (ValueError, EOFError, TypeError, pickle.UnpicklingError):
+        pass
+
+    return None
+
+
+def is_fresh(snapshot):
+    files_fingerprint = snapshot["fingerprint"]
+    return fingerprint([each[0] for each in files_fingerprint]) == files_fingerprint
+
+
+def load_snapshot(path, context=None):
+    """
+    return snapshot dict when it exists and files it was made from are unchanged, otherwise None.
+    context: when given, snapshot of other context is treated as stale.
+    """
+    snapshot = read_snapshot(path)
+    if snapshot is None:
+        return None
+
+    if context is not None and snapshot["context"] != context:
+        return None
+
+    if not is_fresh(snapshot):
+        return None
+
+    return snapshot
@@ -0,0 +1,140 @@
+#-*- coding: utf8 -*-
+"""
+opt-in instrumentation of sticky.
+
+    from sticky.StickyStats import stats
+    stats.enable()
+    manager.set("projectA", "ep02", tool_name="toolA")
+    print(stats.summary())
+    stats.save_chrome_trace("trace.json")   # open with chrome://tracing or perfetto
+
+instrumented code checks stats.enabled before counting, so disabled stats cost one attribute lookup.
+"""
+
+import os
+import json
+import time
+import threading
+
+clock = getattr(time, "perf_counter", time.time)
+
+
+class _NullSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_null_span = _NullSpan()
+
+
+class Span(object):
+    def __init__(self, stats, name, args):
+        self.stats = stats
+        self.name = name
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = clock()
+        return self
+
+    def __exit__(self, *args):
+        self.stats.add_span(self.name, self.start, clock(), self.args)
+        return False
+
+
+class Stats(object):
+    """
+    counters and timed spans.
+    counters: name -> number. e.g. "read.bytes", "values_override.nodes", "fs.scandir".
+    spans: (name, start, end, thread id, args). start and end are seconds of perf_counter.
+    hooks are called with (name, seconds, args) when a span ends.
+    """
+    def __init__(self, max_spans=100000):
+        self.enabled = False
+        self.max_spans = max_spans
+        self.counters = {}
+        self.spans = []
+        self._hooks = []
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.spans = []
+
+    def add_hook(self, callback):
+        if callback not in self._hooks:
+            self._hooks.append(callback)
+
+    def remove_hook(self, callback):
+        if callback in self._hooks:
+            self._hooks.remove(callback)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def span(self, name, **args):
+        """
+        with stats.span("name"): ... records the time of the block while enabled.
+        """
+        if not self.enabled:
+            return _null_span
+
+        return Span(self, name, args)
+
+    def add_span(self, name, start, end, args=None):
+        with self._lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append((name, start, end, threading.current_thread().ident, args or {}))
+
+        for callback in list(self._hooks):
+            callback(name, end - start, args or {})
+
+    def summary(self):
+        """
+        {"counters": {...}, "spans": {name: {"count": n, "seconds": total}}}
+        """
+        spans = {}
+        for name, start, end, thread_id, args in list(self.spans):
+            entry = spans.setdefault(name, {"count": 0, "seconds": 0.0})
+            entry["count"] += 1
+            entry["seconds"] += end - start
+
+        return {"counters": dict(self.counters), "spans": spans}
+
+    def to_chrome_trace(self):
+        """
+        dict of chrome trace event format. spans are complete events and counters are one counter event.
+        """
+        pid = os.getpid()
+        events = []
+        end = 0
+        for name, start, stop, thread_id, args in list(self.spans):
+            events.append({"name": name, "cat": "sticky", "ph": "X", "pid": pid, "tid": thread_id,
+                           "ts": start * 1e6, "dur": (stop - start) * 1e6,
+                           "args": dict((k, v if isinstance(v, (int, float, bool)) else str(v)) for k, v in args.items())})
+            end = max(end, stop)
+
+        if self.counters:
+            events.append({"name": "counters", "cat": "sticky", "ph": "C", "pid": pid, "tid": 0,
+                           "ts": end * 1e6, "args": dict(self.counters)})
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_chrome_trace(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+
+stats = Stats()
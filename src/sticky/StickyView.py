@@ -0,0 +1,117 @@
+#-*- coding: utf8 -*-
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from sticky.StickyCache import copy_tree
+from sticky.StickyBackend import select_data
+
+_MISSING = object()
+
+
+class LazyConfig(Mapping):
+    """
+    read-only view of the merged result of override layers.
+    a key is merged from the layers with StickyConfig.values_override rules when it is accessed first,
+    and the result is kept for the next access. values of the layers are not modified.
+
+    a key whose values are dicts in every layer is returned as a nested LazyConfig,
+    so only accessed parts of large sections are merged.
+    to_dict() returns the whole merged result, same as merging every layer with values_override.
+    select: tree of StickyBackend.select_tree for layers read with select. type markers on the way are removed.
+    """
+    def __init__(self, layers, sticky=None, select=None):
+        if sticky is None:
+            from sticky.Sticky import StickyConfig
+            sticky = StickyConfig()
+
+        self._layers = [layer for layer in layers]
+        self._sticky = sticky
+        self._select = select
+        self._values = {}
+        self._keys = None
+        self._paths = {}
+
+    def _resolve(self, key):
+        if key in self._values:
+            return self._values[key]
+
+        values = [layer[key] for layer in self._layers if key in layer]
+        use_mapping = bool(self._sticky.field_value)
+        select = self._select.get(key) if self._select else None
+        if values and not use_mapping and all(isinstance(v, dict) for v in values):
+            value = LazyConfig(values, self._sticky, select)
+        else:
+            # same as merging {key: value} of every layer from an empty dict
+            value = _MISSING
+            for layer in self._layers:
+                if key in layer:
+                    base = {} if value is _MISSING else {key: value}
+                    value = self._sticky.values_override(base, {key: layer[key]}, inplace=False).get(key, _MISSING)
+                elif value is not _MISSING and use_mapping:
+                    value = self._sticky.values_override({key: value}, {}, inplace=False).get(key, _MISSING)
+
+            if select and value is not _MISSING and value is not None:
+                value = select_data(value, select, keep_types=False) if isinstance(value, dict) else _MISSING
+
+            if value is not _MISSING:
+                value = copy_tree(value)
+
+        self._values[key] = value
+        return value
+
+    def _key_order(self):
+        if self._keys is None:
+            # keys of upper layer come first, and keys only in lower layers follow. same order as values_override.
+            keys = []
+            for layer in self._layers:
+                keys = list(layer.keys()) + [k for k in keys if k not in layer]
+            self._keys = keys
+
+        return self._keys
+
+    def __getitem__(self, key):
+        value = self._resolve(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self._resolve(key) is not _MISSING
+
+    def __iter__(self):
+        for key in self._key_order():
+            if self._resolve(key) is not _MISSING:
+                yield key
+
+    def __len__(self):
+        return sum(1 for key in self)
+
+    def __repr__(self):
+        return "LazyConfig({!r})".format(self.to_dict())
+
+    def get_path(self, path, default=None):
+        """
+        value of dotted key path. "general.resolution.fps"
+        """
+        if path in self._paths:
+            return self._paths[path]
+
+        value = self
+        for key in path.split("."):
+            if not isinstance(value, Mapping) or key not in value:
+                return default
+            value = value[key]
+
+        self._paths[path] = value
+        return value
+
+    def to_dict(self):
+        result = {}
+        for key in self:
+            value = self[key]
+            result[key] = value.to_dict() if isinstance(value, LazyConfig) else copy_tree(value)
+
+        return result
@@ -0,0 +1,241 @@
+#-*- coding: utf8 -*-
+
+import os
+import threading
+import traceback
+
+from sticky.StickyCache import normalize_path, file_stamp, fingerprint, file_cache, info_cache, directory_index, version_index
+
+_scandir = getattr(os, "scandir", None)
+_UNKNOWN = object()
+
+
+def scan_directory(directory, names):
+    """
+    list directory once and stat only entries in names.
+    names are normcased like watched paths, and entries are compared by normcase of their names.
+    return (frozenset of every name, {normcased name: (mtime, size)}), or (None, {}) when the directory is missing.
+    os.scandir gets stat of entries with the listing on windows, so a watched share costs one request per directory.
+    """
+    stamps = {}
+    try:
+        if _scandir is not None:
+            listing = []
+            it = _scandir(directory)
+            try:
+                for entry in it:
+                    listing.append(entry.name)
+                    name = os.path.normcase(entry.name)
+                    if name in names:
+                        try:
+                            stamps[name] = file_stamp(entry.stat())
+                        except OSError:
+                            pass
+            finally:
+                if hasattr(it, "close"):
+                    it.close()
+        else:
+            listing = os.listdir(directory)
+            for each in listing:
+                name = os.path.normcase(each)
+                if name in names:
+                    try:
+                        stamps[name] = file_stamp(os.stat(os.path.join(directory, each)))
+                    except OSError:
+                        pass
+    except OSError:
+        return None, {}
+
+    return frozenset(listing), stamps
+
+
+class StickyWatcher(object):
+    """
+    poll files which resolved configs were made from, in a background thread.
+
+    watch(manager) watches config files of the current config of StickyProjectManager and its root directory
+    (a new vN file changes the listing). each poll lists every watched directory once and stats only watched files.
+    when something is changed, cached files of the changed paths are dropped and
+    callbacks are called with (contexts, paths). contexts are resolution keys of affected managers.
+    resolution cache is validated by fingerprint, so the next StickyProjectManager.set re-merges from the changed layer.
+    """
+    def __init__(self, interval=2.0):
+        self.interval = interval
+        self.polls = 0
+        self._contexts = {}
+        # normalized file path -> [stamp, context keys]
+        self._files = {}
+        # normalized directory -> [listing, context keys watching the listing, basenames of watched files]
+        self._directories = {}
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._files)
+
+    def subscribe(self, callback):
+        if callback not in self._callbacks:
+            self._callbacks.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._callbacks:
+            self._callbacks.remove(callback)
+
+    def watch(self, manager):
+        """
+        watch files of the current config of manager. call this after set.
+        return the context key.
+        """
+        files_fingerprint = manager.resolution.fingerprint
+        key = manager.get_resolution_key()
+        self.add(key, files_fingerprint[1:], [manager.root_directory])
+        return key
+
+    def add(self, key, files, directories=()):
+        """
+        files: paths or fingerprint of files. stamps of fingerprint are compared at the first poll,
+        so changes made after the fingerprint was taken are not missed.
+        directories: directories whose listing is watched.
+        """
+        stamps = {}
+        for each in files:
+            if isinstance(each, (tuple, list)):
+                stamps[normalize_path(each[0])] = tuple(each[1:])
+            else:
+                stamps[normalize_path(each)] = fingerprint([each])[0][1:]
+
+        directories = [normalize_path(each) for each in directories]
+        listings = dict((each, scan_directory(each, ())[0]) for each in directories)
+
+        with self._lock:
+            self._remove(key)
+            self._contexts[key] = (tuple(stamps), tuple(directories))
+
+            for path, stamp in stamps.items():
+                entry = self._files.get(path)
+                if entry is None:
+                    entry = self._files[path] = [stamp, set()]
+                    directory, name = os.path.split(path)
+                    self._directory(directory)[2].add(name)
+                entry[1].add(key)
+
+            for directory in directories:
+                entry = self._directory(directory)
+                if entry[0] is _UNKNOWN:
+                    entry[0] = listings[directory]
+                entry[1].add(key)
+
+    def _directory(self, directory):
+        entry = self._directories.get(directory)
+        if entry is None:
+            entry = self._directories[directory] = [_UNKNOWN, set(), set()]
+        return entry
+
+    def remove(self, key):
+        with self._lock:
+            return self._remove(key)
+
+    def _remove(self, key):
+        paths, directories = self._contexts.pop(key, ((), ()))
+        for path in paths:
+            entry = self._files[path]
+            entry[1].discard(key)
+            if not entry[1]:
+                del self._files[path]
+                directory, name = os.path.split(path)
+                self._directories[directory][2].discard(name)
+
+        for directory in directories:
+            self._directories[directory][1].discard(key)
+
+        for directory in set(os.path.dirname(path) for path in paths) | set(directories):
+            entry = self._directories[directory]
+            if not entry[1] and not entry[2]:
+                del self._directories[directory]
+
+        return bool(paths or directories)
+
+    def contexts(self):
+        return list(self._contexts)
+
+    def poll(self, notify=True):
+        """
+        check watched files once. return (affected contexts, changed paths).
+        """
+        with self._lock:
+            targets = [(directory, frozenset(entry[2])) for directory, entry in self._directories.items()]
+
+        scanned = [(directory, names) + scan_directory(directory, names) for directory, names in targets]
+
+        contexts = set()
+        changed = []
+        with self._lock:
+            self.polls += 1
+            for directory, names, listing, stamps in scanned:
+                entry = self._directories.get(directory)
+                if entry is None:
+                    continue
+
+                if entry[1] and listing != entry[0]:
+                    if entry[0] is not _UNKNOWN:
+                        changed.append(directory)
+                        contexts.update(entry[1])
+                    entry[0] = listing
+
+                for name in names:
+                    path = os.path.join(directory, name)
+                    file_entry = self._files.get(path)
+                    if file_entry is None:
+                        continue
+                    stamp = stamps.get(name, (None, None))
+                    if stamp != file_entry[0]:
+                        changed.append(path)
+                        contexts.update(file_entry[1])
+                        file_entry[0] = stamp
+
+        for path in changed:
+            if path in self._directories:
+                directory_index.invalidate(path)
+                version_index.invalidate(path)
+            else:
+                directory_index.invalidate(os.path.dirname(path))
+                version_index.invalidate(os.path.dirname(path))
+                file_cache.invalidate(path)
+                info_cache.invalidate(path)
+
+        contexts = sorted(contexts, key=repr)
+        if notify and changed:
+            for callback in list(self._callbacks):
+                try:
+                    callback(contexts, changed)
+                except Exception:
+                    traceback.print_exc()
+
+        return contexts, changed
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="StickyWatcher")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                traceback.print_exc()
@@ -0,0 +1,87 @@
+# -*- coding: utf8 -*-
+
+import sys
+import unittest
+import threading
+
+from sticky.StickyProjectManager import StickyProjectManager
+from sticky.StickyContext import StickyContext
+from sticky.StickyCache import resolution_cache, clear_cache
+
+# coroutines are run with run_until_complete, so this file has no async syntax and imports on python 2.7
+if sys.version_info >= (3, 5):
+    import asyncio
+    from sticky.StickyAsync import AsyncResolver, resolve
+
+
+@unittest.skipIf(sys.version_info < (3, 5), "asyncio with async/await is required")
+class AsyncResolverTest(unittest.TestCase):
+    def setUp(self):
+        clear_cache()
+        self.loop = asyncio.new_event_loop()
+        self.manager = StickyProjectManager()
+        self.obj = AsyncResolver(self.manager)
+
+    def expected(self, project, variation, tool_name=False):
+        obj = StickyProjectManager()
+        obj.use_resolution_cache = False
+        obj.set(project, variation, tool_name=tool_name)
+        return obj.config_files, obj.config
+
+    def test_resolve(self):
+        resolution = self.loop.run_until_complete(self.obj.resolve("projectA", "ep02", tool_name="toolA"))
+        config_files, config = self.expected("projectA", "ep02", "toolA")
+        self.assertEqual(list(resolution.config_files), config_files)
+        self.assertEqual(resolution.config, config)
+
+        # shared with the sync api
+        self.manager.set("projectA", "ep02", tool_name="toolA")
+        self.assertTrue(self.manager.resolution is resolution)
+
+    def test_module_resolve(self):
+        resolution = self.loop.run_until_complete(resolve("projectA", select=["general.resolution.fps"]))
+        self.assertEqual(resolution.config, {"general": {"resolution": {"fps": 30}}})
+
+    def test_in_flight(self):
+        calls = []
+        get_config_files = self.manager._get_config_files
+
+        def _get_config_files(context, key_config_files=None):
+            calls.append(context)
+            return get_config_files(context, key_config_files)
+
+        self.manager._get_config_files = _get_config_files
+        contexts = [StickyContext("projectA", "ep02", "toolA")] * 10 + [StickyContext("projectA")] * 5
+        resolutions = self.loop.run_until_complete(self.obj.resolve_many(contexts))
+        self.assertEqual(len(calls), 2)
+        self.assertTrue(all(each is resolutions[0] for each in resolutions[:10]))
+        self.assertEqual(resolutions[-1].config, self.expected("projectA", "default")[1])
+        self.assertEqual(self.obj._pending, {})
+
+    def test_key_off_loop(self):
+        threads = []
+
+        class Manager(StickyProjectManager):
+            def get_key_config_files(self):
+                threads.append(threading.current_thread())
+                return super(Manager, self).get_key_config_files()
+
+        obj = AsyncResolver(Manager())
+        resolution = self.loop.run_until_complete(obj.resolve("projectA", "ep02"))
+        self.assertEqual(resolution.config, self.expected("projectA", "ep02")[1])
+        # found once for the key and the resolution, not on the loop
+        self.assertEqual(len(threads), 1)
+        self.assertFalse(threads[0] is threading.current_thread())
+
+    def test_error(self):
+        context = StickyContext("projectA", root_directory="nothing")
+        self.assertRaises(Exception, self.loop.run_until_complete, self.obj.resolve_context(context))
+        self.assertEqual(self.obj._pending, {})
+
+    def tearDown(self):
+        self.loop.close()
+        resolution_cache.clear()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+# -*- coding: utf8 -*-
+
+import unittest
+import tempfile
+import shutil
+
+import yaml
+
+from sticky.Sticky import StickyConfig
+from sticky.StickyBackend import YamlBackend, JsonBackend, get_backend, register_backend, unregister_backend, \
+    select_tree, select_data
+from sticky.StickyCache import file_cache
+
+
+class BackendTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp().replace("\\", "/")
+        self.obj = StickyConfig(self.directory)
+        self.info = {"name": "base", "parent": None}
+        self.data = {"a": 1, "b": 1.5, "c": True, "d": None, "e": u"日本語",
+                     "f": [{"name": "x", "value": 1}], "g": {"h": [1, 2, 3]}}
+
+    def test_get_backend(self):
+        self.assertTrue(isinstance(get_backend("a/b.v1.yml"), YamlBackend))
+        self.assertTrue(isinstance(get_backend("a/b.JSON"), JsonBackend))
+        self.assertEqual(get_backend("a/b.txt"), None)
+
+    def test_yaml_backends_identical(self):
+        path = "{}/base.yml".format(self.directory)
+        self.obj.save(path, info=self.info, data=self.data)
+
+        pure = YamlBackend(use_libyaml=False)
+        self.assertTrue(pure.loader is yaml.SafeLoader)
+        expected = {"info": self.info, "data": self.data}
+        self.assertEqual(pure.load_file(path), expected)
+        self.assertEqual(YamlBackend().load_file(path), expected)
+
+    def test_json_backends_identical(self):
+        path = "{}/base.json".format(self.directory)
+        self.obj.save(path, info=self.info, data=self.data)
+
+        expected = {"info": self.info, "data": self.data}
+        self.assertEqual(JsonBackend(codec=None).load_file(path), expected)
+        self.assertEqual(JsonBackend().load_file(path), expected)
+
+    def test_load_info(self):
+        for ext in ["yml", "json"]:
+            path = "{}/base.{}".format(self.directory, ext)
+            self.obj.save(path, info=self.info, data=self.data)
+            self.assertEqual(get_backend(path).load_info(path), self.info)
+            self.assertEqual(self.obj.read_info(path), self.info)
+
+    def test_load_info_after_data(self):
+        path = "{}/base.yml".format(self.directory)
+        with open(path, "w") as f:
+            f.write("data:\n  a: &anchor [1, 2]\n  b: {c: [3, {d: 4}]}\ninfo:\n  name: base\n  parent: ../a.yml\n")
+        self.assertEqual(get_backend(path).load_info(path), {"name": "base", "parent": "../a.yml"})
+
+        path = "{}/base.json".format(self.directory)
+        with open(path, "w") as f:
+            f.write('{"data": {"a": [1, "]}", {"b": "\\"{"}], "c": 1.5}, "x": null, "info": {"name": "base"}}')
+        self.assertEqual(get_backend(path).load_info(path), {"name": "base"})
+
+    def test_load_info_alias(self):
+        path = "{}/base.yml".format(self.directory)
+        with open(path, "w") as f:
+            f.write("data:\n  a: &anchor base\ninfo:\n  name: *anchor\n")
+        self.assertEqual(get_backend(path).load_info(path), {"name": "base"})
+
+    def test_load_info_missing(self):
+        for ext, text in [("yml", "data: {}\n"), ("json", '{"data": {}}')]:
+            path = "{}/base.{}".format(self.directory, ext)
+            with open(path, "w") as f:
+                f.write(text)
+            self.assertRaises(KeyError, get_backend(path).load_info, path)
+
+    def test_select_tree(self):
+        self.assertEqual(select_tree(["a.b", "a.c", "d"]), {"a": {"b": {}, "c": {}}, "d": {}})
+        self.assertEqual(select_tree(["a.b", "a"]), {"a": {}})
+        self.assertEqual(select_tree(["a", "a.b"]), {"a": {}})
+
+    def test_select_data(self):
+        data = {"a": {"b": 1, "c": [1], "x": 2}, "d": None, "e": "f", "g": 3}
+        tree = select_tree(["a.b", "a.c", "a.nothing", "d.h", "e.f", "nothing"])
+        self.assertEqual(select_data(data, tree), {"a": {"b": 1, "c": [1]}, "d": None, "e": "f"})
+        self.assertEqual(select_data(data, tree, keep_types=False), {"a": {"b": 1, "c": [1]}, "d": None})
+        self.assertEqual(select_data({"a": [1, 2]}, select_tree(["a.b"])), {"a": []})
+
+    def test_read_select(self):
+        select = ["g.h.i", "f", "d", "x.y", "a.b"]
+        expected = {"g": {"h": []}, "f": [{"name": "x", "value": 1}], "d": None, "a": 1}
+        for ext in ["yml", "json"]:
+            path = "{}/base.{}".format(self.directory, ext)
+            self.obj.save(path, info=self.info, data=self.data)
+            self.assertEqual(self.obj.read(path, select=select), (self.info, expected))
+
+            # from the whole file in cache
+            self.obj.read(path)
+            self.assertEqual(self.obj.read(path, select=select), (self.info, expected))
+
+    def test_read_select_skip(self):
+        path = "{}/base.yml".format(self.directory)
+        with open(path, "w") as f:
+            f.write("info: {name: base}\ndata:\n  a: !!python/name:os.getcwd\n  "
+                    "b: {c: 1, d: [!!python/name:os.getcwd ]}\n  e: {x: &x {f: 2}, g: {<<: *x, h: 3}}\n")
+
+        # unselected values are not constructed
+        self.assertRaises(yaml.YAMLError, YamlBackend().load_file, path)
+        self.assertEqual(self.obj.read(path, select=["b.c", "e"])[1], {"b": {"c": 1}, "e": {"x": {"f": 2}, "g": {"f": 2, "h": 3}}})
+
+    def test_read_select_alias(self):
+        path = "{}/base.yml".format(self.directory)
+        with open(path, "w") as f:
+            f.write("info: {name: base}\ndata:\n  a: &x {f: 2}\n  b: {c: *x, d: {<<: *x, h: 3}}\n")
+
+        # anchor of skipped value. the whole file is loaded
+        self.assertEqual(self.obj.read(path, select=["b"])[1], {"b": {"c": {"f": 2}, "d": {"f": 2, "h": 3}}})
+
+    def test_register_backend(self):
+        register_backend("yaml", YamlBackend())
+        try:
+            path = "{}/base.yaml".format(self.directory)
+            self.obj.save(path, info=self.info, data=self.data)
+            info, data = self.obj.read(path)
+            self.assertEqual(data, self.data)
+        finally:
+            unregister_backend("yaml")
+
+        self.assertEqual(self.obj.read(path), ({}, {}))
+
+    def tearDown(self):
+        file_cache.clear()
+        shutil.rmtree(self.directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+# -*- coding: utf8 -*-
+
+import os
+import unittest
+import tempfile
+import shutil
+
+from sticky.Sticky import StickyConfig
+from sticky.StickyCache import ParsedFileCache, VersionIndex, file_cache
+
+
+class ParsedFileCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp().replace("\\", "/")
+        self.obj = StickyConfig(self.directory)
+        self.path = "{}/base.yml".format(self.directory)
+        self.obj.save(self.path, info={"name": "base"}, data={"a": {"b": 1}, "c": [1, 2]})
+        file_cache.clear()
+
+    def test_hit(self):
+        self.obj.read(self.path)
+        self.obj.read(self.path)
+        self.assertEqual(file_cache.misses, 1)
+        self.assertEqual(file_cache.hits, 1)
+
+    def test_isolated_copy(self):
+        info, data = self.obj.read(self.path)
+        data["a"]["b"] = 100
+        data["c"].append(3)
+
+        info, data = self.obj.read(self.path)
+        self.assertEqual(data, {"a": {"b": 1}, "c": [1, 2]})
+
+    def test_modified_file(self):
+        self.obj.read(self.path)
+        with open(self.path, "w") as f:
+            f.write("info:\n  name: base\ndata:\n  a: changed\n")
+
+        info, data = self.obj.read(self.path)
+        self.assertEqual(data, {"a": "changed"})
+
+    def test_save_invalidate(self):
+        self.obj.read(self.path)
+        self.obj.save(self.path, info={"name": "base"}, data={"a": {"b": 2}, "c": [1, 2]})
+        self.assertFalse(self.path in file_cache)
+
+        info, data = self.obj.read(self.path)
+        self.assertEqual(data["a"]["b"], 2)
+
+    def test_eviction(self):
+        cache = ParsedFileCache(max_entries=2)
+        paths = []
+        for name in ["a", "b", "c"]:
+            path = "{}/{}.yml".format(self.directory, name)
+            self.obj.save(path, info={"name": name}, data={})
+            paths.append(path)
+            cache.get(path, self.obj._read)
+
+        self.assertEqual(len(cache), 2)
+        self.assertFalse(paths[0] in cache)
+        self.assertTrue(paths[2] in cache)
+
+        self.assertTrue(cache.invalidate(paths[2]))
+        self.assertFalse(paths[2] in cache)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def tearDown(self):
+        file_cache.clear()
+        shutil.rmtree(self.directory)
+
+
+class VersionIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp().replace("\\", "/")
+        for name in ["base.v1.yml", "base.v9.yml", "base.v10.yml", "base.ep01.v2.yml", "base.vx.yml", "memo.txt"]:
+            with open("{}/{}".format(self.directory, name), "w") as f:
+                f.write("")
+        self.index = VersionIndex()
+
+    def test_get(self):
+        index = self.index.get(self.directory)
+        self.assertEqual(sorted(index), ["base", "base.ep01"])
+        self.assertEqual(index["base"], ((1, "base.v1.yml"), (9, "base.v9.yml"), (10, "base.v10.yml")))
+        self.assertEqual(self.index.latest(self.directory, "base"), "base.v10.yml")
+        self.assertEqual(self.index.latest(self.directory, "projectA"), None)
+        self.assertEqual(self.index.get("{}/nothing".format(self.directory)), {})
+
+    def test_normcase(self):
+        self.assertEqual(self.index.latest(self.directory, "BASE"), None)
+
+        # as on windows
+        self.index.normcase = lambda name: name.lower()
+        with open("{}/Base.EP02.V3.YML".format(self.directory), "w") as f:
+            f.write("")
+        self.index.invalidate(self.directory)
+        self.assertEqual(self.index.latest(self.directory, "BASE"), "base.v10.yml")
+        self.assertEqual(self.index.latest(self.directory, "base.ep02"), "Base.EP02.V3.YML")
+
+    def test_cached(self):
+        self.index.get(self.directory)
+        self.index.get(self.directory)
+        self.assertEqual((self.index.hits, self.index.misses), (1, 1))
+
+        os.remove("{}/base.v10.yml".format(self.directory))
+        self.index.invalidate(self.directory)
+        self.assertEqual(self.index.latest(self.directory, "base"), "base.v9.yml")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+# -*- coding: utf8 -*-
+
+import os
+import sys
+import time
+import unittest
+import tempfile
+import shutil
+
+from sticky.StickyHook import HookRegistry
+
+sample_path = os.path.normpath(os.path.join(__file__, "../../"))
+sys.path.append(sample_path)
+
+HOOK = """
+def execute(keys, field_value):
+    for key in keys:
+        field_value[key] = "{}"
+    return field_value
+"""
+
+
+class HookRegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        sys.path.insert(0, self.directory)
+        self.path = os.path.join(self.directory, "sticky_test_hook.py")
+        self.write("v1")
+        self.obj = HookRegistry(check_interval=0)
+
+    def write(self, value):
+        with open(self.path, "w") as f:
+            f.write(HOOK.format(value))
+
+    def test_load_once(self):
+        self.assertEqual(self.obj.execute("sticky_test_hook", ["<a>"], {}), {"<a>": "v1"})
+        self.obj.execute("sticky_test_hook", ["<a>"], {})
+        self.assertEqual(self.obj.loads, 1)
+
+    def test_reload_modified(self):
+        self.obj.execute("sticky_test_hook", ["<a>"], {})
+        self.write("v2")
+        mtime = os.stat(self.path).st_mtime + 10
+        os.utime(self.path, (mtime, mtime))
+
+        self.assertEqual(self.obj.execute("sticky_test_hook", ["<a>"], {}), {"<a>": "v2"})
+        self.assertEqual(self.obj.loads, 2)
+
+    def test_check_interval(self):
+        obj = HookRegistry(check_interval=3600)
+        obj.get("sticky_test_hook")
+        self.write("v2")
+        mtime = time.time() + 10
+        os.utime(self.path, (mtime, mtime))
+        self.assertEqual(obj.execute("sticky_test_hook", ["<a>"], {}), {"<a>": "v1"})
+
+    def test_execute_batch_fallback(self):
+        actual = self.obj.execute_batch("sticky_test_hook", ["<a>"], [{}, {"<b>": "b"}])
+        self.assertEqual(actual, [{"<a>": "v1"}, {"<a>": "v1", "<b>": "b"}])
+
+    def test_execute_batch(self):
+        actual = self.obj.execute_batch("sample.custom.sample",
+                                        ["<shot{scene}>", "<shot{cut}>"],
+                                        [{"<shot>": "s01c02"}, {"<shot>": "s03c04"}])
+        self.assertEqual(actual, [{"<shot>": "s01c02", "<shot{scene}>": "s01", "<shot{cut}>": "c02"},
+                                  {"<shot>": "s03c04", "<shot{scene}>": "s03", "<shot{cut}>": "c04"}])
+
+    def tearDown(self):
+        sys.path.remove(self.directory)
+        sys.modules.pop("sticky_test_hook", None)
+        shutil.rmtree(self.directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
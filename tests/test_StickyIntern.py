@@ -0,0 +1,91 @@
+# -*- coding: utf8 -*-
+
+import sys
+import unittest
+
+from sticky.StickyIntern import Interner
+from sticky.StickyProjectManager import StickyProjectManager
+from sticky.StickyContext import StickyContext
+from sticky.StickyCache import resolution_cache
+
+
+class InternerTest(unittest.TestCase):
+    def setUp(self):
+        self.obj = Interner()
+
+    def test_share(self):
+        a = self.obj.intern({"a": {"b": [1, 2, {"c": "x"}]}, "d": "value"})
+        b = self.obj.intern({"d": "".join(["val", "ue"]), "a": {"b": [1, 2, {"c": "x"}]}})
+        self.assertEqual(a, b)
+        self.assertTrue(a["a"] is b["a"])
+        self.assertTrue(a["d"] is b["d"])
+        self.assertTrue(a["a"] in self.obj)
+        self.assertTrue(self.obj.intern(a) is a)
+
+    def test_types(self):
+        a = self.obj.intern({"a": [1], "b": [True], "c": [1.0], "d": (1,)})
+        self.assertFalse(a["a"] is a["b"])
+        self.assertFalse(a["a"] is a["c"])
+        self.assertEqual(a["d"], (1,))
+        self.assertTrue(a["b"][0] is True)
+
+    @unittest.skipIf(sys.version_info < (3, 7), "dict order is kept from python 3.7")
+    def test_order(self):
+        a = self.obj.intern({"a": 1, "b": 2})
+        b = self.obj.intern({"b": 2, "a": 1})
+        self.assertEqual(list(b), ["b", "a"])
+        self.assertFalse(a is b)
+
+    def test_max_entries(self):
+        self.obj.max_entries = 2
+        a = self.obj.intern({"a": [1]})
+        self.obj.intern({"b": [2]})
+        b = self.obj.intern({"a": [1]})
+        self.assertEqual(a, b)
+        self.assertFalse(a is b)
+
+
+class ManagerInternTest(unittest.TestCase):
+    def setUp(self):
+        resolution_cache.clear()
+        self.obj = StickyProjectManager()
+
+    def test_resolve(self):
+        expected = [self.obj.resolve(StickyContext("projectA", variation, "toolA")).config
+                    for variation in ["default", "ep02"]]
+        resolution_cache.clear()
+
+        self.obj.use_intern = True
+        configs = [self.obj.resolve(StickyContext("projectA", variation, "toolA")).config
+                   for variation in ["default", "ep02"]]
+        self.assertEqual(configs, expected)
+        for key in configs[0]:
+            if configs[0][key] == configs[1][key]:
+                self.assertTrue(configs[0][key] is configs[1][key])
+
+        interner = resolution_cache.interner
+        self.assertTrue(configs[0] in interner)
+        self.assertTrue(len(interner) > 0)
+
+        # config of set is shared too
+        self.obj.set("projectA", "ep02", tool_name="toolA")
+        self.assertEqual(self.obj.config, expected[1])
+        self.assertTrue(self.obj.config is configs[1])
+
+        # the table is freed with the cache
+        resolution_cache.clear()
+        self.assertEqual(len(interner), 0)
+
+    def test_interner(self):
+        self.obj.use_intern = True
+        self.obj.interner = Interner()
+        config = self.obj.resolve(StickyContext("projectA")).config
+        self.assertTrue(config in self.obj.interner)
+        self.assertFalse(config in resolution_cache.interner)
+
+    def tearDown(self):
+        resolution_cache.clear()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+# -*- coding: utf8 -*-
+
+import os
+import json
+import unittest
+import tempfile
+import shutil
+
+from sticky.StickyContext import StickyContext
+from sticky.StickyProjectManager import StickyProjectManager
+from sticky.StickyPrecompute import enumerate_contexts, snapshot_name, precompute, main
+from sticky.StickyCache import version_index
+
+
+class PrecomputeTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp().replace("\\", "/")
+        self.output = "{}/snapshots".format(self.directory)
+
+    def test_enumerate_contexts(self):
+        contexts = enumerate_contexts("sample/env")
+        self.assertEqual(contexts, [StickyContext("projectA", "default", False, "sample/env"),
+                                    StickyContext("projectA", "default", "toolA", "sample/env"),
+                                    StickyContext("projectA", "ep02", False, "sample/env"),
+                                    StickyContext("projectA", "ep02", "toolA", "sample/env")])
+
+        contexts = enumerate_contexts("sample/env", tools=[])
+        self.assertEqual(set(each.project for each in contexts), set(["projectA", "toolA"]))
+
+    def test_enumerate_contexts_normcase(self):
+        # as on windows, upper case extensions are version files and names keep their case
+        directory = "{}/env".format(self.directory)
+        shutil.copytree("sample/env", directory)
+        os.rename("{}/projectA.ep02.v1.yml".format(directory), "{}/projectA.ep02.V1.YML".format(directory))
+        version_index.normcase = lambda name: name.lower()
+        try:
+            version_index.invalidate(directory)
+            contexts = enumerate_contexts(directory)
+        finally:
+            del version_index.normcase
+            version_index.invalidate(directory)
+
+        self.assertEqual([(each.project, each.variation) for each in contexts if not each.tool_name],
+                         [("projectA", "default"), ("projectA", "ep02")])
+
+    def test_snapshot_name(self):
+        self.assertEqual(snapshot_name(StickyContext("projectA")), "projectA.default.snap")
+        self.assertEqual(snapshot_name(StickyContext("projectA", "ep02", "toolA")), "toolA.projectA.ep02.snap")
+
+    def test_precompute(self):
+        for processes in [1, 2]:
+            summary = precompute("sample/env", self.output, processes=processes)
+            self.assertEqual(summary["contexts"], 4)
+            self.assertEqual(summary["failed"], 0)
+            self.assertEqual(summary["processes"], processes)
+
+            obj = StickyProjectManager()
+            for each in summary["results"]:
+                self.assertTrue(obj.load_snapshot(each["snapshot"], each["project"], each["variation"],
+                                                  tool_name=each["tool_name"]))
+
+            with open("{}/summary.json".format(self.output)) as f:
+                self.assertEqual(json.load(f)["contexts"], 4)
+
+    def test_failed(self):
+        summary = precompute("sample/env", contexts=[StickyContext("projectA"), StickyContext("nothing", root_directory="nothing")],
+                             processes=1)
+        self.assertEqual(summary["failed"], 1)
+        self.assertEqual(summary["results"][0]["config_files"], 3)
+        self.assertTrue(summary["results"][1]["error"])
+
+    def test_main(self):
+        self.assertEqual(main(["sample/env", self.output, "-j", "1"]), 0)
+        self.assertEqual(len([name for name in os.listdir(self.output) if name.endswith(".snap")]), 4)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,8 +6,12 @@ import sys
 import unittest
 import tempfile
 import shutil
+import threading
 
 from sticky.StickyProjectManager import StickyProjectManager
+from sticky.StickyContext import StickyContext
+from sticky.StickyCache import resolution_cache, clear_cache
+from sticky.StickyBackend import select_tree, select_data
 
 sample_path = os.path.normpath(os.path.join(__file__, "../../"))
 print(sample_path)
@@ -64,5 +68,271 @@ class StickyProjectManagerTest(unittest.TestCase):
         self.assertEqual(self.obj.config_files, results)
 
 
+class ResolutionCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = "{}/env".format(tempfile.mkdtemp().replace("\\", "/"))
+        shutil.copytree("sample/env", self.directory)
+        self.obj = StickyProjectManager()
+        self.obj.root_directory = self.directory
+        resolution_cache.clear()
+
+    def test_hit(self):
+        self.obj.set("projectA", "ep02", tool_name="toolA")
+        config = self.obj.config
+        config["general"]["resolution"]["fps"] = 1
+
+        self.obj.set("projectA", "ep02", tool_name="toolA")
+        self.assertEqual(resolution_cache.hits, 1)
+        self.assertEqual(resolution_cache.misses, 1)
+        self.assertEqual(self.obj.config["general"]["resolution"]["fps"], 30)
+        self.assertEqual(len(self.obj.config_files), 6)
+
+        self.obj.set("projectA", "default", tool_name="toolA")
+        self.assertEqual(resolution_cache.misses, 2)
+
+    def test_modified(self):
+        self.obj.set("projectA", "default")
+        path = "{}/projectA.v1.yml".format(self.directory)
+        self.obj.sticky.save(path, info={"parent": "../base.v2.yml", "name": "projectA.v1"},
+                             data={"general": {"resolution": {"fps": 60}}})
+
+        self.obj.set("projectA", "default")
+        self.assertEqual(resolution_cache.hits, 0)
+        self.assertEqual(self.obj.config["general"]["resolution"]["fps"], 60)
+
+    def test_incremental(self):
+        self.obj.set("projectA", "ep02", tool_name="toolA")
+        read = self.obj.sticky.read
+        reads = []
+
+        def _read(path, *args, **kwargs):
+            reads.append(os.path.basename(path))
+            return read(path, *args, **kwargs)
+
+        self.obj.sticky.read = _read
+        self.obj.sticky.save("{}/toolA.projectA.ep02.v1.yml".format(self.directory),
+                             info={"parent": "../toolA.v1.yml", "name": "toolA.projectA.ep02.v1"},
+                             data={"keyA": "changed"})
+
+        self.obj.set("projectA", "ep02", tool_name="toolA")
+        self.assertEqual(reads, ["toolA.projectA.ep02.v1.yml"])
+        self.assertEqual(self.obj.config["keyA"], "changed")
+        self.assertEqual(self.obj.config["general"]["resolution"]["fps"], 30)
+
+        self.obj.use_resolution_cache = False
+        self.obj.set("projectA", "ep02", tool_name="toolA")
+        self.assertEqual(self.obj.config["keyA"], "changed")
+
+    def test_lazy(self):
+        self.obj.set("projectA", "ep02", tool_name="toolA")
+        config = self.obj.config
+        resolution_cache.clear()
+
+        self.obj.set("projectA", "ep02", tool_name="toolA", lazy=True)
+        self.assertEqual(self.obj.config["general"]["resolution"]["width"], 3840)
+        self.assertEqual(self.obj.config.to_dict(), config)
+        self.assertEqual(len(self.obj.config_files), 6)
+
+        self.obj.set("projectA", "ep02", tool_name="toolA")
+        self.obj.set("projectA", "ep02", tool_name="toolA", lazy=True)
+        self.assertEqual(self.obj.config.to_dict(), config)
+
+    def test_added(self):
+        self.obj.set("projectA", "default")
+        self.obj.sticky.save("{}/projectA.v2.yml".format(self.directory),
+                             info={"parent": "../projectA.v1.yml", "name": "projectA.v2"},
+                             data={"general": {"resolution": {"fps": 25}}})
+
+        self.obj.set("projectA", "default")
+        self.assertEqual(self.obj.config_files[-1], "{}/projectA.v2.yml".format(self.directory))
+        self.assertEqual(self.obj.config["general"]["resolution"]["fps"], 25)
+
+    def test_select(self):
+        self.obj.set("projectA", "ep02", tool_name="toolA")
+        config = self.obj.config
+
+        self.obj.set("projectA", "ep02", tool_name="toolA", select=["general.resolution", "keyA", "nothing.a"])
+        self.assertEqual(self.obj.config, {"general": {"resolution": config["general"]["resolution"]},
+                                           "keyA": config["keyA"]})
+
+        self.obj.set("projectA", "ep02", tool_name="toolA", select=["general.resolution.fps"], lazy=True)
+        self.assertEqual(self.obj.config.to_dict(), {"general": {"resolution": {"fps": 30}}})
+
+        # full config is cached apart
+        self.obj.set("projectA", "ep02", tool_name="toolA")
+        self.assertEqual(self.obj.config, config)
+
+    def test_select_type_mismatch(self):
+        # base wins on a type mismatch, so selected values follow the types of lower layers
+        self.obj.sticky.save("{}/mismatch.v1.yml".format(self.directory),
+                             info={"name": "mismatch.v1"},
+                             data={"playblast": False, "a": [1], "b": {"c": 1}, "d": {"e": 1}})
+        self.obj.sticky.save("{}/mismatch.ep01.v1.yml".format(self.directory),
+                             info={"parent": "../mismatch.v1.yml", "name": "mismatch.ep01.v1"},
+                             data={"playblast": {"format": "mov"}, "a": {"b": 1}, "b": False, "d": {"e": 2}})
+        select = ["playblast.format", "a.b", "b.c", "d.e"]
+        self.obj.set("mismatch", "ep01")
+        expected = select_data(self.obj.config, select_tree(select), keep_types=False)
+        self.assertEqual(expected, {"b": {"c": 1}, "d": {"e": 2}})
+
+        self.obj.set("mismatch", "ep01", select=select)
+        self.assertEqual(self.obj.config, expected)
+
+        self.obj.set("mismatch", "ep01", select=select, lazy=True)
+        self.assertEqual(self.obj.config.to_dict(), expected)
+
+        resolution_cache.clear()
+        self.obj.set("mismatch", "ep01", select=select, lazy=True)
+        self.assertEqual(self.obj.config.to_dict(), expected)
+
+    def test_numeric_version(self):
+        for version in [9, 10]:
+            self.obj.sticky.save("{}/projectA.v{}.yml".format(self.directory, version),
+                                 info={"parent": "../projectA.v1.yml", "name": "projectA.v{}".format(version)},
+                                 data={"general": {"resolution": {"fps": version}}})
+
+        self.obj.set("projectA", "default")
+        self.assertEqual(self.obj.config_files[-1], "{}/projectA.v10.yml".format(self.directory))
+        self.assertEqual(self.obj.config["general"]["resolution"]["fps"], 10)
+
+    def test_size(self):
+        resolution_cache.max_entries = 1
+        try:
+            self.obj.set("projectA", "default")
+            self.obj.set("projectA", "ep02")
+            self.assertEqual(len(resolution_cache), 1)
+        finally:
+            resolution_cache.max_entries = 256
+
+    def tearDown(self):
+        resolution_cache.clear()
+        shutil.rmtree(os.path.dirname(self.directory))
+
+
+class GlobManager(StickyProjectManager):
+    def get_key_config_files(self):
+        return ["{}/{}.v1.yml".format(self.root_directory, self.project)]
+
+
+class ShotManager(StickyProjectManager):
+    shot_project = "projectA"
+
+    def get_key_config_files(self):
+        return ["{}/{}.v1.yml".format(self.root_directory, self.shot_project)]
+
+
+class CountManager(ShotManager):
+    def get_key_config_files(self):
+        # called on a copy of the manager. the list is shared with it
+        self.calls.append(self.project)
+        return super(CountManager, self).get_key_config_files()
+
+
+class SuperManager(StickyProjectManager):
+    def get_key_config_files(self):
+        config_files = super(SuperManager, self).get_key_config_files()
+        return config_files + ["{}/toolA.v1.yml".format(self.root_directory)]
+
+
+class ResolveContextTest(unittest.TestCase):
+    def setUp(self):
+        self.obj = StickyProjectManager()
+        self.contexts = [StickyContext(project, variation, tool_name)
+                         for project in ["projectA", "sample"]
+                         for variation in ["default", "ep02"]
+                         for tool_name in [False, "toolA"]]
+        resolution_cache.clear()
+
+    def expected(self, context):
+        obj = StickyProjectManager()
+        obj.use_resolution_cache = False
+        obj.set(context.project, context.variation, tool_name=context.tool_name)
+        return obj.config_files, obj.config
+
+    def test_resolve(self):
+        self.obj.set("projectA", "default")
+        resolution = self.obj.resolve(StickyContext("projectA", "ep02", "toolA"))
+        self.assertEqual(len(resolution.config_files), 6)
+        self.assertEqual(self.obj.variation, "default")
+        self.assertEqual(len(self.obj.config_files), 3)
+
+        # set and resolve share the cache
+        self.obj.set("projectA", "ep02", tool_name="toolA")
+        self.assertTrue(self.obj.resolution is resolution)
+
+    def test_root_directory(self):
+        self.obj.root_directory = "nothing"
+        resolution = self.obj.resolve(StickyContext("projectA", root_directory="sample/env"))
+        self.assertEqual(resolution.config_files[-1], "sample/env/projectA.v1.yml")
+        self.assertRaises(Exception, self.obj.resolve, StickyContext("projectA"))
+
+    def test_subclass(self):
+        obj = GlobManager()
+        obj.project = "base"
+        resolution = obj.resolve(StickyContext("projectA"))
+        self.assertEqual(resolution.key_config_files, ("sample/env/projectA.v1.yml",))
+        self.assertEqual(obj.project, "base")
+
+    def test_subclass_state(self):
+        obj = ShotManager()
+        obj.set("projectA")
+        self.assertEqual(obj.config_files[-1], "sample/env/projectA.v1.yml")
+        obj.shot_project = "toolA.projectA"
+        obj.set("projectA")
+        self.assertEqual(obj.key_config_files, ["sample/env/toolA.projectA.v1.yml"])
+        self.assertEqual(obj.config_files[-1], "sample/env/toolA.projectA.v1.yml")
+
+    def test_subclass_lookups(self):
+        # files found for the key are used to resolve, so the rule runs once for each set
+        obj = CountManager()
+        obj.calls = []
+        obj.set("projectA")
+        self.assertEqual(len(obj.calls), 1)
+        obj.set("projectA")
+        self.assertEqual(len(obj.calls), 2)
+        obj.resolve(StickyContext("projectA", "ep02"))
+        self.assertEqual(len(obj.calls), 3)
+
+    def test_subclass_super(self):
+        obj = SuperManager()
+        obj.set("projectA", "ep02")
+        self.assertEqual(obj.key_config_files, ["sample/env/projectA.ep02.v1.yml", "sample/env/toolA.v1.yml"])
+        resolution = obj.resolve(StickyContext("projectA"))
+        self.assertEqual(resolution.key_config_files, ("sample/env/projectA.v1.yml", "sample/env/toolA.v1.yml"))
+
+    def test_resolve_many(self):
+        resolutions = self.obj.resolve_many(self.contexts)
+        for context, resolution in zip(self.contexts, resolutions):
+            config_files, config = self.expected(context)
+            self.assertEqual(list(resolution.config_files), config_files)
+            self.assertEqual(resolution.config, config)
+
+    def test_stress(self):
+        expected = dict((context, self.expected(context)[1]) for context in self.contexts)
+        errors = []
+
+        def _run(i):
+            try:
+                for n in range(50):
+                    context = self.contexts[(i + n) % len(self.contexts)]
+                    if n % 17 == 0:
+                        clear_cache()
+                    if self.obj.resolve(context).config != expected[context]:
+                        errors.append(context)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=_run, args=(i,)) for i in range(8)]
+        for each in threads:
+            each.start()
+        for each in threads:
+            each.join()
+
+        self.assertEqual(errors, [])
+
+    def tearDown(self):
+        resolution_cache.clear()
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,109 @@
+# -*- coding: utf8 -*-
+
+import os
+import copy
+import unittest
+import tempfile
+import shutil
+
+from sticky.Sticky import StickyConfig
+from sticky.StickyProvenance import Provenance
+from sticky.StickyProjectManager import StickyProjectManager
+from sticky.StickyCache import resolution_cache
+
+
+class ProvenanceTest(unittest.TestCase):
+    maxDiff = None
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp().replace("\\", "/")
+        self.obj = StickyConfig(self.directory)
+        self.layers = [
+            {"a": 1,
+             "test": {"abc": "abc"},
+             "test2": {"def": 1, "ghi": 10, "pqr": ["a", "b", "c"],
+                       "stu": [{"name": "a", "value": 100},
+                               {"name": "b", "value": 200},
+                               {"name": "c", "value": 300}]},
+             "removed": {"x": 1}},
+            {"b": 2,
+             "test3": {"jkl": 999, "mno": "TEMP"},
+             "removed": None},
+            {"c": 3,
+             "test2": {"def": 2, "pqr": [1, 2, 3],
+                       "stu": [{"name": "a", "value": 150},
+                               {"name": "c", "cancel": True},
+                               {"name": "d", "value": 450}]},
+             "test3": {"jkl": 100}}
+        ]
+        self.files = []
+        for name, data in zip(["a", "b", "c"], self.layers):
+            path = "{}/{}.yml".format(self.directory, name)
+            self.obj.save(path, info={"name": name}, data=data)
+            self.files.append(path)
+
+    def test_file_of(self):
+        config, provenance = Provenance.from_layers(self.files, copy.deepcopy(self.layers), self.obj)
+        self.assertEqual(provenance.file_of(("a",)), self.files[0])
+        self.assertEqual(provenance.file_of(("test2", "def")), self.files[2])
+        self.assertEqual(provenance.file_of(("test2", "ghi")), self.files[0])
+        self.assertEqual(provenance.file_of(("test2", "pqr")), self.files[2])
+        self.assertEqual(provenance.file_of(("test2", "stu", "a", "value")), self.files[2])
+        self.assertEqual(provenance.file_of(("test2", "stu", "b", "value")), self.files[0])
+        self.assertEqual(provenance.file_of(("test2", "stu", "c", "value")), None)
+        self.assertEqual(provenance.file_of(("removed", "x")), None)
+        self.assertEqual(provenance.file_id(("test3", "mno")), 1)
+
+        # values keep their types
+        self.assertEqual(config["test2"]["def"], 2)
+
+    def test_origin(self):
+        config, provenance = Provenance.from_layers(self.files, copy.deepcopy(self.layers), self.obj)
+        self.assertEqual(provenance.origin("test2.def"), self.files[2])
+        self.assertEqual(provenance.origin(("test2", "ghi")), self.files[0])
+        self.assertEqual(provenance.origin("test2.stu.b.value"), self.files[0])
+        self.assertEqual(provenance.origin("test2"), None)
+        self.assertEqual(provenance.origin("nothing"), None)
+
+    def test_layers_touching(self):
+        config, provenance = Provenance.from_layers(self.files, copy.deepcopy(self.layers), self.obj)
+        self.assertEqual(provenance.layers_touching("test2"), [self.files[0], self.files[2]])
+        self.assertEqual(provenance.layers_touching("test2.stu.b"), [self.files[0]])
+        self.assertEqual(provenance.layers_touching("test3"), [self.files[1], self.files[2]])
+        self.assertEqual(provenance.layers_touching("test3.jkl"), [self.files[1], self.files[2]])
+        self.assertEqual(provenance.layers_touching(), self.files)
+        self.assertEqual(provenance.layers_touching("nothing"), [])
+
+    def test_render(self):
+        config, provenance = Provenance.from_layers(self.files, copy.deepcopy(self.layers), self.obj)
+        actual = provenance.render(config)
+        expected = self.obj.trace_files(copy.deepcopy(config), self.files)
+
+        # trace_files appends canceled items, and render leaves them out
+        name = "/".join(self.files[2].split("/")[-2:])
+        canceled = expected["test2"]["stu"].pop()
+        self.assertEqual(canceled, {"name": "c--->{}".format(name), "cancel": "True--->{}".format(name)})
+        self.assertEqual(actual, expected)
+
+    def test_manager(self):
+        resolution_cache.clear()
+        obj = StickyProjectManager()
+        obj.set("projectA", "ep02", tool_name="toolA")
+        self.assertEqual(obj.provenance, None)
+
+        obj.set("projectA", "ep02", tool_name="toolA", trace=True)
+        self.assertEqual(os.path.basename(obj.provenance.file_of(("general", "resolution", "width"))),
+                         "toolA.projectA.ep02.v1.yml")
+        self.assertEqual(os.path.basename(obj.provenance.file_of(("keyA",))), "toolA.v1.yml")
+
+        resolution = obj.resolution
+        obj.set("projectA", "ep02", tool_name="toolA", trace=True)
+        self.assertTrue(obj.resolution is resolution)
+        resolution_cache.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
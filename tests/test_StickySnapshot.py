@@ -0,0 +1,102 @@
+# -*- coding: utf8 -*-
+
+import os
+import sys
+import datetime
+import unittest
+import tempfile
+import shutil
+import subprocess
+
+from sticky.StickyProjectManager import StickyProjectManager
+from sticky.StickySnapshot import compile_snapshot, load_snapshot, read_snapshot
+from sticky.StickyCache import resolution_cache
+from sticky.StickyView import LazyConfig
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.mkdtemp().replace("\\", "/")
+        self.directory = "{}/env".format(self.temp)
+        shutil.copytree("sample/env", self.directory)
+        self.path = "{}/snapshot/projectA.bin".format(self.temp)
+        self.obj = StickyProjectManager()
+        self.obj.root_directory = self.directory
+        resolution_cache.clear()
+
+    def test_compile_load(self):
+        self.assertFalse(self.obj.load_snapshot(self.path, "projectA", "ep02", tool_name="toolA"))
+        config = self.obj.config
+        config_files = self.obj.config_files
+
+        obj = StickyProjectManager()
+        obj.root_directory = self.directory
+        self.assertTrue(obj.load_snapshot(self.path, "projectA", "ep02", tool_name="toolA"))
+        self.assertEqual(obj.config, config)
+        self.assertEqual(obj.config_files, config_files)
+
+        # other context rebuilds snapshot
+        self.assertFalse(obj.load_snapshot(self.path, "projectA", "default"))
+        self.assertEqual(len(obj.config_files), 3)
+
+    def test_kwargs(self):
+        self.obj.load_snapshot(self.path, "projectA", "ep02", tool_name="toolA")
+        config = self.obj.config
+
+        obj = StickyProjectManager()
+        obj.root_directory = self.directory
+        obj.set("projectA", "default", trace=True)
+        self.assertTrue(obj.load_snapshot(self.path, "projectA", "ep02", tool_name="toolA", lazy=True))
+        self.assertEqual(obj.provenance, None)
+        self.assertTrue(isinstance(obj.config, LazyConfig))
+        self.assertEqual(obj.config.to_dict(), config)
+
+        # snapshots have no provenance
+        self.assertFalse(obj.load_snapshot(self.path, "projectA", "ep02", tool_name="toolA", trace=True))
+        self.assertTrue(obj.provenance.origin("keyA") in obj.config_files)
+        self.assertEqual(obj.config, config)
+
+    def test_stale(self):
+        self.obj.load_snapshot(self.path, "projectA", "default")
+        self.obj.sticky.save("{}/projectA.v1.yml".format(self.directory),
+                             info={"parent": "../base.v2.yml", "name": "projectA.v1"},
+                             data={"general": {"resolution": {"fps": 60}}})
+        self.assertEqual(load_snapshot(self.path), None)
+
+        self.assertFalse(self.obj.load_snapshot(self.path, "projectA", "default"))
+        self.assertEqual(self.obj.config["general"]["resolution"]["fps"], 60)
+        self.assertTrue(self.obj.load_snapshot(self.path, "projectA", "default"))
+
+        # new version file
+        self.obj.sticky.save("{}/projectA.v2.yml".format(self.directory),
+                             info={"parent": "../projectA.v1.yml", "name": "projectA.v2"},
+                             data={"general": {"resolution": {"fps": 25}}})
+        self.assertFalse(self.obj.load_snapshot(self.path, "projectA", "default"))
+        self.assertEqual(self.obj.config["general"]["resolution"]["fps"], 25)
+
+    def test_load_without_yaml(self):
+        self.obj.load_snapshot(self.path, "projectA", "default")
+        code = "\n".join(["import sys",
+                          "from sticky.StickySnapshot import load_snapshot",
+                          "snapshot = load_snapshot(sys.argv[1])",
+                          "assert snapshot['config']['general']['resolution']['width'] == 3840",
+                          "assert 'yaml' not in sys.modules"])
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(sys.path)
+        subprocess.check_call([sys.executable, "-c", code, self.path], env=env)
+
+    def test_pickle_fallback(self):
+        path = "{}/a.yml".format(self.temp)
+        with open(path, "w") as f:
+            f.write("")
+        config = {"date": datetime.date(2020, 1, 1)}
+        compile_snapshot(self.path, config, [path], [(path, 0, 0)])
+        self.assertEqual(read_snapshot(self.path)["config"], config)
+
+    def tearDown(self):
+        resolution_cache.clear()
+        shutil.rmtree(self.temp)
+
+
+if __name__ == "__main__":
+    unittest.main()
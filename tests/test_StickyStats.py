@@ -0,0 +1,83 @@
+# -*- coding: utf8 -*-
+
+import json
+import unittest
+import tempfile
+import shutil
+
+from sticky.StickyProjectManager import StickyProjectManager
+from sticky.StickyStats import Stats, stats
+from sticky.StickyCache import clear_cache
+
+
+class StatsTest(unittest.TestCase):
+    def setUp(self):
+        self.obj = Stats()
+
+    def test_disabled(self):
+        with self.obj.span("a"):
+            pass
+        self.assertEqual(self.obj.spans, [])
+
+    def test_span(self):
+        calls = []
+        self.obj.add_hook(lambda name, seconds, args: calls.append((name, args)))
+        self.obj.enable()
+        with self.obj.span("a", path="x"):
+            self.obj.count("b")
+            self.obj.count("b", 2)
+
+        self.assertEqual(calls, [("a", {"path": "x"})])
+        summary = self.obj.summary()
+        self.assertEqual(summary["counters"], {"b": 3})
+        self.assertEqual(summary["spans"]["a"]["count"], 1)
+
+        trace = self.obj.to_chrome_trace()
+        self.assertEqual([each["ph"] for each in trace["traceEvents"]], ["X", "C"])
+        self.assertEqual(trace["traceEvents"][0]["args"], {"path": "x"})
+
+        self.obj.reset()
+        self.assertEqual(self.obj.summary(), {"counters": {}, "spans": {}})
+
+
+class ManagerStatsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp().replace("\\", "/")
+        clear_cache()
+        stats.reset()
+        stats.enable()
+
+    def test_set(self):
+        obj = StickyProjectManager()
+        obj.set("projectA", "ep02", tool_name="toolA")
+        counters = stats.summary()["counters"]
+        self.assertEqual(counters["read.parses"], 6)
+        self.assertTrue(counters["read.bytes"] > 0)
+        self.assertEqual(counters["fs.scandir"], 1)
+        self.assertEqual(counters["get_override_file_list.hops"], 4)
+        self.assertEqual(counters["manager.layers_merged"], 6)
+        self.assertTrue(counters["values_override.nodes"] > 0)
+        self.assertEqual(stats.summary()["spans"]["read.parse"]["count"], 6)
+
+        path = "{}/trace.json".format(self.directory)
+        stats.save_chrome_trace(path)
+        with open(path) as f:
+            names = set(each["name"] for each in json.load(f)["traceEvents"])
+        self.assertTrue(set(["manager.set", "manager.merge", "read.parse", "counters"]) <= names)
+
+    def test_set_select(self):
+        obj = StickyProjectManager()
+        obj.set("projectA", "ep02", tool_name="toolA", select=["general.resolution"])
+        counters = stats.summary()["counters"]
+        self.assertEqual(counters["read.select_parses"], 6)
+        self.assertTrue(counters["read.bytes"] > 0)
+
+    def tearDown(self):
+        stats.disable()
+        stats.reset()
+        clear_cache()
+        shutil.rmtree(self.directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
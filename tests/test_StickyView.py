@@ -0,0 +1,76 @@
+# -*- coding: utf8 -*-
+
+import copy
+import unittest
+
+from sticky.Sticky import StickyConfig
+from sticky.StickyView import LazyConfig
+
+
+class LazyConfigTest(unittest.TestCase):
+    def setUp(self):
+        self.sticky = StickyConfig()
+        self.layers = [
+            {"general": {"resolution": {"width": 1920, "height": 1080, "fps": 24},
+                         "env": [{"name": "A", "value": 1}, {"name": "B", "value": 2}]},
+             "removed": {"a": 1},
+             "mismatch": {"a": 1},
+             "c": [1, 2, 3]},
+            {"general": {"resolution": {"fps": 30},
+                         "env": [{"name": "B", "cancel": True}, {"name": "C", "value": 3}]},
+             "removed": None,
+             "mismatch": [1, 2]},
+            {"general": {"app": "maya"},
+             "c": [4],
+             "d": {"e": "f"}}
+        ]
+
+    def merged(self, layers):
+        config = {}
+        for layer in layers:
+            config = self.sticky.values_override(config, copy.deepcopy(layer))
+        return config
+
+    def test_to_dict(self):
+        layers = copy.deepcopy(self.layers)
+        view = LazyConfig(layers, self.sticky)
+        self.assertEqual(view.to_dict(), self.merged(self.layers))
+        self.assertEqual(sorted(view.keys()), sorted(self.merged(self.layers).keys()))
+        self.assertEqual(layers, self.layers)
+
+    def test_access(self):
+        view = LazyConfig(self.layers, self.sticky)
+        self.assertTrue(isinstance(view["general"], LazyConfig))
+        self.assertEqual(view["general"]["resolution"]["fps"], 30)
+        self.assertEqual(view["general"]["env"], [{"name": "A", "value": 1}, {"name": "C", "value": 3}])
+        self.assertEqual(view["mismatch"], {"a": 1})
+        self.assertFalse("removed" in view)
+        self.assertRaises(KeyError, view.__getitem__, "removed")
+        self.assertEqual(view.get("removed", "default"), "default")
+        self.assertEqual(len(view), 4)
+
+    def test_memoize(self):
+        view = LazyConfig(self.layers, self.sticky)
+        self.assertTrue(view["general"] is view["general"])
+        self.assertTrue(view["c"] is view["c"])
+
+        # resolved values are copies of layer values
+        view["c"].append(5)
+        self.assertEqual(self.layers[2]["c"], [4])
+
+    def test_get_path(self):
+        view = LazyConfig(self.layers, self.sticky)
+        self.assertEqual(view.get_path("general.resolution.width"), 1920)
+        self.assertEqual(view.get_path("general.app"), "maya")
+        self.assertEqual(view.get_path("general.nothing"), None)
+        self.assertEqual(view.get_path("c.nothing", "x"), "x")
+
+    def test_field_value(self):
+        self.sticky.set("C:/env", {"<project>": "PROJ1"})
+        layers = [{"a": {"b": "<project>_b"}}, {"a": {"c": "@../x"}, "d": ["<project>"]}]
+        view = LazyConfig(layers, self.sticky)
+        self.assertEqual(view.to_dict(), self.merged(layers))
+
+
+if __name__ == "__main__":
+    unittest.main()
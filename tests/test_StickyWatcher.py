@@ -0,0 +1,125 @@
+# -*- coding: utf8 -*-
+
+import os
+import unittest
+import tempfile
+import shutil
+import threading
+
+from sticky.StickyProjectManager import StickyProjectManager
+from sticky.StickyWatcher import StickyWatcher, scan_directory
+from sticky.StickyCache import resolution_cache, file_cache, normalize_path
+
+
+def touch(path, text):
+    with open(path, "a") as f:
+        f.write(text)
+    st = os.stat(path)
+    os.utime(path, (st.st_atime, st.st_mtime + 10))
+
+
+class StickyWatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = "{}/env".format(tempfile.mkdtemp().replace("\\", "/"))
+        shutil.copytree("sample/env", self.directory)
+        resolution_cache.clear()
+        self.obj = StickyProjectManager()
+        self.obj.root_directory = self.directory
+        self.obj.set("projectA", "ep02", tool_name="toolA")
+        self.watcher = StickyWatcher(interval=0.01)
+        self.calls = []
+        self.watcher.subscribe(lambda contexts, paths: self.calls.append((contexts, paths)))
+        self.key = self.watcher.watch(self.obj)
+
+    def test_scan_directory(self):
+        listing, stamps = scan_directory(self.directory, frozenset(["base.v1.yml", "nothing.yml"]))
+        self.assertEqual(len(listing), 7)
+        self.assertEqual(list(stamps), ["base.v1.yml"])
+        self.assertEqual(scan_directory("{}/nothing".format(self.directory), ()), (None, {}))
+
+    def test_normcase(self):
+        # as on windows, watched paths are lower case and names on disk are not.
+        # only file names are lowered, so the temporary directory is found on case-sensitive file systems.
+        normcase = os.path.normcase
+        os.path.normcase = lambda path: os.path.join(os.path.dirname(path), os.path.basename(path).lower())
+        try:
+            watcher = StickyWatcher()
+            path = "{}/projectA.v1.yml".format(self.directory)
+            watcher.add("key", [path])
+            self.assertEqual(watcher.poll(), ([], []))
+
+            touch(path, "\n")
+            self.assertEqual(watcher.poll(), (["key"], [normalize_path(path)]))
+            self.assertEqual(watcher.poll(), ([], []))
+        finally:
+            os.path.normcase = normcase
+
+    def test_unchanged(self):
+        self.assertEqual(len(self.watcher), len(self.obj.config_files))
+        self.assertEqual(self.watcher.poll(), ([], []))
+        self.assertEqual(self.calls, [])
+
+    def test_modified(self):
+        path = "{}/projectA.v1.yml".format(self.directory)
+        self.assertTrue(path in file_cache)
+        touch(path, "\n")
+
+        self.assertEqual(self.watcher.poll(), ([self.key], [normalize_path(path)]))
+        self.assertEqual(self.calls, [([self.key], [normalize_path(path)])])
+        self.assertFalse(path in file_cache)
+
+        # reported once
+        self.assertEqual(self.watcher.poll(), ([], []))
+
+    def test_added(self):
+        shutil.copy("{}/projectA.ep02.v1.yml".format(self.directory), "{}/projectA.ep02.v2.yml".format(self.directory))
+        contexts, paths = self.watcher.poll()
+        self.assertEqual(contexts, [self.key])
+        self.assertEqual(paths, [normalize_path(self.directory)])
+
+        self.obj.set("projectA", "ep02", tool_name="toolA")
+        self.assertTrue("{}/projectA.ep02.v2.yml".format(self.directory) in self.obj.config_files)
+
+    def test_removed(self):
+        os.remove("{}/toolA.v1.yml".format(self.directory))
+        contexts, paths = self.watcher.poll()
+        self.assertEqual(contexts, [self.key])
+        self.assertEqual(len(paths), 2)
+
+    def test_shared_files(self):
+        other = StickyProjectManager()
+        other.root_directory = self.directory
+        other.set("projectA", "default")
+        other_key = self.watcher.watch(other)
+
+        touch("{}/base.v2.yml".format(self.directory), "\n")
+        contexts, paths = self.watcher.poll()
+        self.assertEqual(set(contexts), set([self.key, other_key]))
+
+        touch("{}/toolA.v1.yml".format(self.directory), "\n")
+        self.assertEqual(self.watcher.poll()[0], [self.key])
+
+        self.watcher.remove(self.key)
+        touch("{}/toolA.v1.yml".format(self.directory), "\n")
+        self.assertEqual(self.watcher.poll(), ([], []))
+        self.watcher.remove(other_key)
+        self.assertEqual(len(self.watcher), 0)
+
+    def test_thread(self):
+        event = threading.Event()
+        self.watcher.subscribe(lambda contexts, paths: event.set())
+        self.watcher.start()
+        try:
+            touch("{}/base.v1.yml".format(self.directory), "\n")
+            self.assertTrue(event.wait(5))
+        finally:
+            self.watcher.stop()
+        self.assertFalse(self.watcher.is_running())
+
+    def tearDown(self):
+        self.watcher.stop()
+        shutil.rmtree(os.path.dirname(self.directory))
+
+
+if __name__ == "__main__":
+    unittest.main()
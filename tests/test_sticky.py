@@ -7,7 +7,8 @@ import unittest
 import tempfile
 import shutil
 
-from sticky.Sticky import FieldValueGenerator, StickyConfig
+from sticky.Sticky import FieldValueGenerator, StickyConfig, CompiledTemplate, compile_template
+from sticky.StickyCache import directory_index
 
 sample_path = os.path.normpath(os.path.join(__file__, "../../"))
 print(sample_path)
@@ -63,6 +64,28 @@ class GetFieldValueTest(unittest.TestCase):
         actual = self.obj.get_field_value(template, value)
         self.assertEqual(actual, False)
 
+class GetFieldValueIterTest(unittest.TestCase):
+    def setUp(self):
+        self.obj = FieldValueGenerator()
+        self.values = ["test1_test2", "test1_1_test2", "test3_test4"]
+        self.expected = [("test1_test2", {"<a>": "test1", "<b>": "test2"}),
+                         ("test1_1_test2", False),
+                         ("test3_test4", {"<a>": "test3", "<b>": "test4"})]
+
+    def test_iter(self):
+        actual = self.obj.get_field_value_iter("<a>_<b>", iter(self.values))
+        self.assertEqual(list(actual), self.expected)
+
+    def test_chunk(self):
+        actual = self.obj.get_field_value_iter("<a>_<b>", self.values, chunk_size=2)
+        self.assertEqual(list(actual), [self.expected[:2], self.expected[2:]])
+
+    def test_processes(self):
+        actual = self.obj.get_field_value_iter("<a>_<b>", self.values * 10, chunk_size=4, processes=2)
+        actual = [record for records in actual for record in records]
+        self.assertEqual(actual, self.expected * 10)
+
+
 class GenerateTest(unittest.TestCase):
     def setUp(self):
         self.obj = FieldValueGenerator()
@@ -98,6 +121,69 @@ class GenerateTest(unittest.TestCase):
         self.assertEqual(actual, "Ep99_s05_c20_c20")
 
 
+class GenerateIterTest(unittest.TestCase):
+    def setUp(self):
+        self.obj = FieldValueGenerator()
+
+    def test_generate_iter(self):
+        template = "<a>_<b>"
+        field_values = [{"<a>": "test1", "<b>": "test2"},
+                        {"<a>": "test3"},
+                        {"<a>": "test4", "<b>": "test5"}]
+        actual = self.obj.generate_iter(template, iter(field_values))
+        self.assertFalse(isinstance(actual, list))
+        self.assertEqual(list(actual), ["test1_test2", False, "test4_test5"])
+
+        actual = self.obj.generate_iter(template, field_values, force=True)
+        self.assertEqual(list(actual), ["test1_test2", "test3_<b>", "test4_test5"])
+
+    def test_generate_iter_custom(self):
+        template = "<episode>_<shot{scene}>_<shot{cut}>"
+        field_values = [{"<shot>": "s05c20", "<episode>": "Ep99"},
+                        {"<shot>": "s01c01", "<episode>": "Ep01"},
+                        {"<episode>": "Ep02"}]
+        actual = self.obj.generate_iter(template, field_values, custom_module_path="sample.custom.sample", chunk_size=2)
+        self.assertEqual(list(actual), ["Ep99_s05_c20", "Ep01_s01_c01", False])
+
+    def test_generate_columns(self):
+        template = "<a>_<b>"
+        columns = {"<a>": ["a1", "a2"], "<b>": ["b1", "b2"]}
+        actual = self.obj.generate_columns(template, columns)
+        self.assertEqual(list(actual), ["a1_b1", "a2_b2"])
+
+        self.assertRaises(ValueError, self.obj.generate_columns, template, {"<a>": ["a1"], "<b>": []})
+
+
+class CompiledTemplateTest(unittest.TestCase):
+    def test_keys(self):
+        obj = CompiledTemplate("<a>_<b>_<a>")
+        self.assertEqual(obj.keys, ("<a>", "<b>", "<a>"))
+
+    def test_match(self):
+        obj = CompiledTemplate("<a>_<b>")
+        self.assertEqual(obj.match("test1_test2"), {"<a>": "test1", "<b>": "test2"})
+        self.assertEqual(obj.match("test1_1_test2"), False)
+        self.assertEqual(obj.match(""), {})
+
+    def test_render(self):
+        obj = CompiledTemplate("<a>_<b>_<a>")
+        self.assertEqual(obj.render({"<a>": "x", "<b>": "y"}), "x_y_x")
+        self.assertEqual(obj.render({"<a>": "x"}), "x_<b>_x")
+
+    def test_render_value_with_key(self):
+        obj = CompiledTemplate("<a>_<b>")
+        self.assertEqual(obj.render({"<a>": "<b>", "<b>": "y"}), "y_y")
+
+    def test_render_key_with_literals(self):
+        # a value and "<" or ">" around a key make another key
+        field_value = {"<a>": "", "<b>": "X"}
+        self.assertEqual(CompiledTemplate("<<a>b>_<b>").render(field_value), "X_X")
+        self.assertEqual(CompiledTemplate("<a<b>>_<a>").render({"<a>": "", "<b>": "X"}), "<aX>_")
+
+    def test_cache(self):
+        self.assertTrue(compile_template("<a>_<b>") is compile_template("<a>_<b>"))
+
+
 # StickyConfig
 class GetKeyFileTest(unittest.TestCase):
     def setUp(self):
@@ -128,6 +214,62 @@ class GetKeyFileTest(unittest.TestCase):
         actual = self.obj.get_key_file(template)
         self.assertEqual(os.path.basename(actual), "ep01_s01_c01_anim.yml")
 
+    def test_get_key_file_added(self):
+        template = "<episode>_<scene>"
+        self.obj.set_field_value({"<episode>": "ep02", "<scene>": "s01"})
+        self.assertEqual(self.obj.get_key_file(template), False)
+
+        open("{}/ep02.json".format(self.directory), "w").close()
+        directory_index.invalidate(self.directory)
+        actual = self.obj.get_key_file(template)
+        self.assertEqual(os.path.basename(actual), "ep02.json")
+
+    def test_get_key_file_mtime(self):
+        template = "<episode>_<scene>"
+        self.obj.set_field_value({"<episode>": "ep03", "<scene>": "s01"})
+        self.assertEqual(self.obj.get_key_file(template), False)
+
+        # listing is refreshed by mtime of the directory, without invalidate
+        open("{}/ep03_s01.yml".format(self.directory), "w").close()
+        st = os.stat(self.directory)
+        os.utime(self.directory, (st.st_atime, st.st_mtime + 10))
+        actual = self.obj.get_key_file(template)
+        self.assertEqual(os.path.basename(actual), "ep03_s01.yml")
+
+    def test_get_key_file_underscore_key(self):
+        for name in ["ABC", "ABC_s01"]:
+            open("{}/{}.yml".format(self.directory, name), "w").close()
+
+        self.obj.set_field_value({"<project>": "ABC", "<shot_name>": "s01"})
+        actual = self.obj.get_key_file("<project>_<shot_name>")
+        self.assertEqual(os.path.basename(actual), "ABC_s01.yml")
+
+        self.obj.set_field_value({"<project>": "ABC", "<shot_name>": "s02"})
+        actual = self.obj.get_key_file("<project>_<shot_name>")
+        self.assertEqual(os.path.basename(actual), "ABC.yml")
+
+    def test_get_key_files(self):
+        template = "<episode>_<scene>_<cut>_<progress>"
+        fields = [{"<episode>": "ep01", "<scene>": "s01"},
+                  {"<episode>": "ep01", "<scene>": "s01", "<cut>": "c01", "<progress>": "anim"},
+                  {"<episode>": "ep03"}]
+        actual = self.obj.get_key_files(fields, template=template)
+        self.assertEqual([os.path.basename(f) if f else f for f in actual],
+                         ["ep01_s01.yml", "ep01_s01_c01_anim.yml", False])
+
+        self.obj.set_field_value({"<episode>": "ep01", "<scene>": "s01"})
+        actual = self.obj.get_key_files(["<episode>", "<episode>_<scene>", "ep01_s01_c01"])
+        self.assertEqual([os.path.basename(f) for f in actual], ["ep01.yml", "ep01_s01.yml", "ep01_s01_c01.yml"])
+
+    def test_get_key_files_without_template(self):
+        self.assertRaises(ValueError, self.obj.get_key_files, ["<episode>", {"<episode>": "ep01"}])
+
+    def test_get_key_file_field_value(self):
+        self.obj.set_field_value({"<episode>": "ep02"})
+        actual = self.obj.get_key_file("<episode>_<scene>", field_value={"<episode>": "ep01", "<scene>": "s01"})
+        self.assertEqual(os.path.basename(actual), "ep01_s01.yml")
+        self.assertEqual(self.obj.field_value, {"<episode>": "ep02"})
+
     def tearDown(self):
         shutil.rmtree(self.directory)
 
@@ -226,6 +368,44 @@ class ValueOverrideKeywordDictTest(unittest.TestCase):
         actual = self.obj.values_override(base, override)
         self.assertEqual(actual, [{"name": "b", "value": 2}])
 
+    def test_duplicated_override_names(self):
+        base = [{"name": "a", "value": 1},
+                {"name": "b", "value": 2}]
+
+        override = [{"name": "b", "value": 20},
+                    {"name": "c", "value": 3},
+                    {"name": "b", "value": 200}]
+        actual = self.obj.values_override(base, override)
+        self.assertEqual(actual, [{"name": "a", "value": 1},
+                                  {"name": "b", "value": 20},
+                                  {"name": "b", "value": 200},
+                                  {"name": "c", "value": 3}])
+
+    def test_duplicated_base_names(self):
+        # every base entry of a name is overridden, and other override entries are kept.
+        # the original loop removed the override entry once per base entry, so "c" was lost.
+        base = [{"name": "a", "value": 1},
+                {"name": "a", "value": 2, "path": "x"},
+                {"name": "b", "value": 3}]
+
+        override = [{"name": "a", "value": 10},
+                    {"name": "c", "value": 5}]
+        actual = self.obj.values_override(base, override)
+        self.assertEqual(actual, [{"name": "a", "value": 10},
+                                  {"name": "a", "value": 10, "path": "x"},
+                                  {"name": "b", "value": 3},
+                                  {"name": "c", "value": 5}])
+
+        # the original loop raised IndexError here
+        actual = self.obj.values_override(base, [{"name": "a", "value": 10}])
+        self.assertEqual(actual, [{"name": "a", "value": 10},
+                                  {"name": "a", "value": 10, "path": "x"},
+                                  {"name": "b", "value": 3}])
+
+    def test_empty_base_list(self):
+        actual = self.obj.values_override({"a": []}, {"a": [{"name": "a", "value": 1}]})
+        self.assertEqual(actual, {"a": [{"name": "a", "value": 1}]})
+
     def test_cancel_by_none(self):
         base = {"name": "b", "value": 2}
         override = {"value": None}
@@ -342,6 +522,43 @@ class ValueOverrideHiearachyTest(unittest.TestCase):
         self.assertEqual(actual, check)
 
 
+class ValueOverrideNotInplaceTest(unittest.TestCase):
+    def setUp(self):
+        self.obj = StickyConfig()
+
+    def test_inputs_untouched(self):
+        base = {"a": {"b": [1, 2]}, "c": [{"name": "x", "value": 1}, {"name": "y", "value": 2}], "d": 1}
+        override = {"c": [{"name": "y", "value": 20}, {"name": "z", "value": 3}], "d": None}
+        actual = self.obj.values_override(base, override, inplace=False)
+
+        self.assertEqual(actual, {"a": {"b": [1, 2]},
+                                  "c": [{"name": "x", "value": 1}, {"name": "y", "value": 20}, {"name": "z", "value": 3}]})
+        self.assertEqual(base, {"a": {"b": [1, 2]}, "c": [{"name": "x", "value": 1}, {"name": "y", "value": 2}], "d": 1})
+        self.assertEqual(override, {"c": [{"name": "y", "value": 20}, {"name": "z", "value": 3}], "d": None})
+
+    def test_shared_values(self):
+        base = {"a": {"b": [1, 2]}, "c": [{"name": "x", "value": 1}, {"name": "y", "value": 2}]}
+        override = {"c": [{"name": "y", "value": 20}], "e": {"f": 1}}
+        actual = self.obj.values_override(base, override, inplace=False)
+
+        self.assertTrue(actual["a"] is base["a"])
+        self.assertTrue(actual["e"] is override["e"])
+        self.assertTrue(actual["c"][0] is base["c"][0])
+
+        override = {"a": {"b": [3]}}
+        self.assertTrue(self.obj.values_override({}, override, inplace=False) is override)
+
+    def test_field_value(self):
+        self.obj.set("C:/test/env", {"<project>": "PROJ1"})
+        base = {"a": "<project>_a", "b": {"c": "@../../tool", "d": "same"}}
+        override = {"e": ["<project>"]}
+        actual = self.obj.values_override(base, override, use_field_value=True, inplace=False)
+
+        self.assertEqual(actual, {"a": "PROJ1_a", "b": {"c": "C:/test/env/tool", "d": "same"}, "e": ["PROJ1"]})
+        self.assertEqual(base, {"a": "<project>_a", "b": {"c": "@../../tool", "d": "same"}})
+        self.assertEqual(override, {"e": ["<project>"]})
+
+
 class ValueMappingTest(unittest.TestCase):
     def setUp(self):
         self.obj = StickyConfig()